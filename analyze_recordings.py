@@ -0,0 +1,207 @@
+# analyze_recordings.py - Streak timeline from recorded gameplay or screenshot folders
+#
+# Runs the same orange-text OCR as the live monitor over a video file or a
+# folder of images and writes every confirmed value change to CSV/Parquet.
+#
+#   python analyze_recordings.py session.mp4 --zone 900,300,1000,340 -o timeline.csv
+#   python analyze_recordings.py screenshots/ --fps 2 --workers 8 -o timeline.parquet
+#
+# Video input needs opencv-python, Parquet output needs pandas + pyarrow.
+import os
+import sys
+import csv
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from color_classifier import ColorClassifier
+from recognition import extract_orange_text
+from settings import SettingsStore, get_config_path, get_cache_dir, parse_zone
+from tracker import StreakTracker
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+DEFAULT_DIFF_PIXELS = 3  # Text mask pixels that may flip before a frame is OCR'd again
+TIMELINE_COLUMNS = ['frame', 'time_s', 'event', 'old_value', 'new_value', 'change_count']
+
+_classifier = None  # Per worker process
+
+
+def _init_worker(classifier_params, cache_dir):
+    global _classifier
+    _classifier = ColorClassifier(cache_dir=cache_dir, **classifier_params)
+
+
+def _recognize(crop):
+    return extract_orange_text(Image.fromarray(crop), _classifier)
+
+
+def iter_image_frames(directory, zone, stride, fps):
+    """Yield (frame, seconds, zone crop) for images in a folder, sorted by name"""
+    names = sorted(n for n in os.listdir(directory) if n.lower().endswith(IMAGE_EXTENSIONS))
+    for index, name in enumerate(names):
+        if index % stride:
+            continue
+        with Image.open(os.path.join(directory, name)) as image:
+            crop = np.asarray(image.crop(zone).convert('RGB'))
+        yield index, index / fps, crop
+
+
+def iter_video_frames(path, zone, stride):
+    """Yield (frame, seconds, zone crop) decoding one frame at a time"""
+    try:
+        import cv2
+    except ImportError:
+        sys.exit("Video input requires opencv-python (pip install opencv-python)")
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        sys.exit(f"Could not open video: {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    x1, y1, x2, y2 = zone
+    index = 0
+    try:
+        while True:
+            if index % stride:
+                # grab() skips the frame without converting it to an image
+                if not capture.grab():
+                    break
+            else:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield index, index / fps, np.ascontiguousarray(frame[y1:y2, x1:x2, ::-1])
+            index += 1
+    finally:
+        capture.release()
+
+
+def recognize_frames(frames, pool, classifier, diff_pixels, max_pending, stats):
+    """Yield (frame, seconds, value) in order, OCR'ing frames in the process pool.
+
+    A frame reuses the last OCR'd result only if its text color mask differs
+    from that frame's mask in at most diff_pixels pixels (negative = always
+    OCR). The mask is what OCR reads, so any change of the number flips far
+    more pixels than that, while background changes flip none. At most
+    max_pending frames are in flight, so memory stays flat for any
+    recording length.
+    """
+    pending = deque()
+    last_mask = None
+    last_value = None
+
+    def resolve():
+        nonlocal last_value
+        index, seconds, future = pending.popleft()
+        if future is not None:
+            last_value = future.result()
+        return index, seconds, last_value
+
+    for index, seconds, crop in frames:
+        stats['frames'] += 1
+        mask = classifier.mask(crop)
+        if (diff_pixels >= 0 and last_mask is not None and mask.shape == last_mask.shape and
+                np.count_nonzero(mask != last_mask) <= diff_pixels):
+            stats['skipped'] += 1
+            pending.append((index, seconds, None))
+        else:
+            stats['ocr'] += 1
+            pending.append((index, seconds, pool.submit(_recognize, crop)))
+            last_mask = mask
+        while pending and (len(pending) > max_pending or
+                           (pending[0][2] is None or pending[0][2].done())):
+            yield resolve()
+    while pending:
+        yield resolve()
+
+
+def build_timeline(readings):
+    """StreakTracker events for a stream of (frame, seconds, value) readings"""
+    tracker = StreakTracker()
+    for index, seconds, value in readings:
+        if not value:
+            continue
+        event = tracker.update(value)
+        if event is None:
+            continue
+        if event[0] == 'initial':
+            yield [index, round(seconds, 3), 'initial', '', event[1], 0]
+        else:
+            yield [index, round(seconds, 3), 'change', event[1], event[2], tracker.change_count]
+
+
+def write_timeline(rows, output):
+    """Write timeline rows as CSV (streamed) or Parquet (by extension), returns row count"""
+    if output.lower().endswith('.parquet'):
+        try:
+            import pandas as pd
+        except ImportError:
+            sys.exit("Parquet output requires pandas and pyarrow (pip install pandas pyarrow)")
+        rows = list(rows)
+        pd.DataFrame(rows, columns=TIMELINE_COLUMNS).to_parquet(output, index=False)
+        return len(rows)
+
+    count = 0
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TIMELINE_COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract a streak timeline from recorded gameplay")
+    parser.add_argument('source', help="Video file or folder of images")
+    parser.add_argument('-o', '--output', default='timeline.csv', help="Output .csv or .parquet file")
+    parser.add_argument('--zone', help="x1,y1,x2,y2 of the streak number (default: zone from config.json)")
+    parser.add_argument('--config', default=get_config_path(), help="config.json with zone and color settings")
+    parser.add_argument('--stride', type=int, default=1, help="Only analyze every Nth frame")
+    parser.add_argument('--diff-pixels', type=int, default=DEFAULT_DIFF_PIXELS,
+                        help="Skip OCR when at most this many text color pixels changed (-1 = OCR every frame)")
+    parser.add_argument('--fps', type=float, default=1.0, help="Frame rate of an image folder, for timestamps")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    args = parser.parse_args()
+
+    settings = SettingsStore(args.config).settings
+    try:
+        zone = parse_zone(args.zone.split(',')) if args.zone else settings.zone
+    except ValueError as e:
+        sys.exit(str(e))
+    if zone is None:
+        sys.exit("No zone given and none selected in config.json (use --zone x1,y1,x2,y2)")
+
+    stride = max(1, args.stride)
+    if os.path.isdir(args.source):
+        frames = iter_image_frames(args.source, zone, stride, args.fps)
+    else:
+        frames = iter_video_frames(args.source, zone, stride)
+
+    classifier_params = {
+        'target_colors': settings.target_colors,
+        'tolerance': settings.color_tolerance,
+        'metric': settings.color_metric,
+        'bits': settings.lut_bits,
+    }
+    # Build the LUT once here so workers load it from the disk cache
+    classifier = ColorClassifier(cache_dir=get_cache_dir(), **classifier_params)
+
+    stats = {'frames': 0, 'ocr': 0, 'skipped': 0}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(classifier_params, get_cache_dir())) as pool:
+        readings = recognize_frames(frames, pool, classifier, args.diff_pixels, args.workers * 4, stats)
+        changes = write_timeline(build_timeline(readings), args.output)
+    elapsed = time.perf_counter() - started
+
+    print(f"Analyzed {stats['frames']} frames in {elapsed:.1f}s ({stats['frames'] / max(elapsed, 1e-9):.1f} frames/s)")
+    print(f"OCR'd {stats['ocr']}, skipped {stats['skipped']} unchanged, stride {stride}")
+    print(f"Wrote {changes} timeline rows to {args.output}")
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
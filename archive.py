@@ -0,0 +1,242 @@
+# archive.py - Local screenshot archive with content-addressed deduplication
+import os
+import time
+import queue
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+from PIL import Image
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_PHASH_DISTANCE = 4  # Bits out of 64 for two frames to count as similar
+RECENT_HASHES = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    hash TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    phash INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL REFERENCES files(hash),
+    detected_value TEXT,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    similar_to TEXT
+);
+CREATE INDEX IF NOT EXISTS captures_status ON captures(status);
+CREATE INDEX IF NOT EXISTS captures_created ON captures(created_at);
+"""
+
+
+def dhash(image, size=8):
+    """64-bit difference hash of an image (perceptual, survives small changes)"""
+    small = image.resize((size + 1, size), Image.Resampling.BOX, reducing_gap=2.0).convert('L')
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def hamming(a, b):
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+
+class _HashingWriter:
+    """File wrapper that hashes everything written through it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+
+class CaptureRecord:
+    """One archived screenshot as stored in the index"""
+
+    __slots__ = ('id', 'file_hash', 'path', 'detected_value', 'created_at', 'status', 'attempts', 'duplicate',
+                 'similar_to')
+
+    def __init__(self, id, file_hash, path, detected_value, created_at, status='pending', attempts=0,
+                 duplicate=False, similar_to=None):
+        self.id = id
+        self.file_hash = file_hash
+        self.path = path
+        self.detected_value = detected_value
+        self.created_at = created_at
+        self.status = status
+        self.attempts = attempts
+        self.duplicate = duplicate
+        self.similar_to = similar_to
+
+
+class ScreenshotArchive:
+    """Stores screenshots under their SHA-256 with a SQLite index.
+
+    PNG encoding and file writes run on a background writer thread. Only
+    byte-identical screenshots share a file. Frames whose perceptual hash is
+    within `phash_distance` of a recent frame are still stored as captured
+    (the streak number may be the only difference) and just note the similar
+    file in `similar_to`.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                 phash_distance=DEFAULT_PHASH_DISTANCE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.phash_distance = phash_distance
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, 'index.db'), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(captures)")]
+        if 'similar_to' not in columns:
+            with self._db:
+                self._db.execute("ALTER TABLE captures ADD COLUMN similar_to TEXT")
+        self._recent = [(row[0], row[1]) for row in self._db.execute(
+            "SELECT phash, hash FROM files ORDER BY created_at DESC LIMIT ?", (RECENT_HASHES,))]
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name='archive-writer', daemon=True)
+        self._writer.start()
+        self.apply_retention()
+
+    def submit(self, image, detected_value):
+        """Queue a screenshot for archiving, returns a Future with its CaptureRecord"""
+        future = Future()
+        self._queue.put((image, detected_value, time.time(), future))
+        return future
+
+    def close(self):
+        """Finish pending writes and close the index"""
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._db.close()
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            image, detected_value, created_at, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._store(image, detected_value, created_at))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                image.close()
+
+    def _store(self, image, detected_value, created_at):
+        phash = dhash(image)
+        file_hash, path, size = self._write_file(image)
+        similar_to = None
+        for recent_phash, recent_hash in self._recent:
+            if recent_hash != file_hash and hamming(phash, recent_phash) <= self.phash_distance:
+                similar_to = recent_hash
+                break
+
+        with self._lock, self._db:
+            duplicate = self._db.execute(
+                "INSERT OR IGNORE INTO files (hash, path, size, phash, created_at) VALUES (?, ?, ?, ?, ?)",
+                (file_hash, path, size, phash, created_at)).rowcount == 0
+            cursor = self._db.execute(
+                "INSERT INTO captures (file_hash, detected_value, created_at, similar_to) VALUES (?, ?, ?, ?)",
+                (file_hash, detected_value, created_at, similar_to))
+
+        if not duplicate:
+            self._recent.insert(0, (phash, file_hash))
+            del self._recent[RECENT_HASHES:]
+            self.apply_retention()
+        return CaptureRecord(cursor.lastrowid, file_hash, os.path.join(self.root, path), detected_value,
+                             created_at, duplicate=duplicate, similar_to=similar_to)
+
+    def _write_file(self, image):
+        """Encode PNG to a temp file while hashing, then move it to its content address"""
+        tmp_path = os.path.join(self.root, f"incoming-{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            writer = _HashingWriter(f)
+            image.save(writer, format='PNG')
+        file_hash = writer.sha.hexdigest()
+        rel_path = os.path.join(file_hash[:2], f"{file_hash}.png")
+        full_path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if os.path.exists(full_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, full_path)
+        return file_hash, rel_path, writer.size
+
+    def mark(self, capture_id, status, error=None):
+        """Record delivery status ('sent' or 'failed') for a capture"""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE captures SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (status, error, capture_id))
+
+    def records(self, status=None, limit=100):
+        """Archived captures, newest first, optionally filtered by status"""
+        query = ("SELECT c.id, c.file_hash, f.path, c.detected_value, c.created_at, c.status, c.attempts "
+                 "FROM captures c JOIN files f ON f.hash = c.file_hash")
+        params = ()
+        if status:
+            query += " WHERE c.status = ?"
+            params = (status,)
+        query += " ORDER BY c.created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(query, params + (limit,)).fetchall()
+        return [CaptureRecord(row[0], row[1], os.path.join(self.root, row[2]), *row[3:]) for row in rows]
+
+    def apply_retention(self):
+        """Drop delivered/failed captures older than max_age_days, then oldest files above max_bytes"""
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM captures WHERE created_at < ? AND status != 'pending'", (cutoff,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+            if total > self.max_bytes:
+                # Delivered screenshots go first, failed ones (which may still be retried) last
+                rows = self._db.execute(
+                    "SELECT hash, size FROM files WHERE hash NOT IN "
+                    "(SELECT file_hash FROM captures WHERE status = 'pending') "
+                    "ORDER BY EXISTS (SELECT 1 FROM captures WHERE file_hash = hash AND status = 'failed'), "
+                    "created_at").fetchall()
+                for file_hash, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM captures WHERE file_hash = ?", (file_hash,))
+                    total -= size
+            orphans = self._db.execute(
+                "SELECT hash, path FROM files WHERE hash NOT IN (SELECT file_hash FROM captures)").fetchall()
+            self._db.executemany("DELETE FROM files WHERE hash = ?", [(h,) for h, _ in orphans])
+
+        removed = {h for h, _ in orphans}
+        self._recent = [entry for entry in self._recent if entry[1] not in removed]
+        for _, path in orphans:
+            try:
+                os.remove(os.path.join(self.root, path))
+            except OSError:
+                pass
@@ -0,0 +1,211 @@
+# async_runtime.py - Asyncio monitor runtime (alternative to the monitor thread)
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from delivery import DeliveryResult, WebhookSender, parse_retry_after, bucket_empty, classify_response
+from tracker import StreakTracker, POLL_INTERVAL
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DEFAULT_WORKERS = 4  # Executor threads shared by capture, OCR and file I/O of all engines
+
+
+class AsyncWebhookSender:
+    """Delivers outbox items over one pooled aiohttp session on the runtime loop.
+
+    Calling the sender from another thread (the outbox flusher) schedules the
+    upload on the loop and waits for its result. Without aiohttp installed,
+    uploads fall back to a pooled requests session in the executor.
+    """
+
+    def __init__(self, runtime, timeout=30, limit=4):
+        self.runtime = runtime
+        self.timeout = timeout
+        self.limit = limit
+        self.session = None
+        self.fallback = WebhookSender(timeout) if aiohttp is None else None
+
+    def __call__(self, item):
+        future = asyncio.run_coroutine_threadsafe(self.send(item), self.runtime.loop)
+        return future.result()
+
+    async def send(self, item):
+        if self.fallback is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.runtime.executor, self.fallback, item)
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        try:
+            with open(item.file_path, 'rb') as f:
+                form = aiohttp.FormData()
+                form.add_field('content', item.message)
+                form.add_field('file', f, filename='screenshot.png', content_type='image/png')
+                async with self.session.post(item.webhook_url, data=form) as response:
+                    retry_after = None
+                    if response.status == 429:
+                        try:
+                            body = await response.json(content_type=None)
+                        except Exception:
+                            body = None
+                        retry_after = parse_retry_after(response.headers, body)
+                    elif bucket_empty(response.headers):
+                        retry_after = parse_retry_after(response.headers)
+                    return classify_response(response.status, retry_after)
+        except FileNotFoundError as e:
+            return DeliveryResult(False, permanent=True, error=str(e))
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            return DeliveryResult(False, error=str(e) or type(e).__name__)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+class ZoneEngine:
+    """Monitors one screen zone as a task on the runtime loop.
+
+    Blocking work (screen capture, OCR, queueing the screenshot) runs in the
+    runtime executor; delays and poll cadence are asyncio timers, so a
+    stopped engine is cancelled immediately instead of finishing a sleep.
+    """
+
+    def __init__(self, name, zone, host):
+        self.name = name
+        self.zone = zone
+        self.host = host
+        self.tracker = StreakTracker()
+
+    async def run(self, executor):
+        loop = asyncio.get_running_loop()
+        run = partial(loop.run_in_executor, executor)
+        host = self.host
+        tracker = self.tracker
+        anchor = host.create_zone_anchor(self.zone, self.name)
+
+        # Build (or load cached) color LUT before the first frame
+        await run(host.get_color_classifier)
+
+        next_tick = loop.time()
+        while True:
+            try:
+                if anchor.base != self.zone:
+                    anchor.reset(self.zone)
+
+                zone_image = await run(host.capture_zone, anchor.zone)
+                try:
+                    detected = await run(host.extract_orange_text, zone_image, self.name)
+                finally:
+                    if zone_image is not None:
+                        zone_image.close()
+                if detected:
+                    anchor.found()
+                else:
+                    await run(host.follow_zone, anchor, detected)
+
+                if detected:
+                    host.post_detection(detected, self.name)
+                    event = tracker.update(detected)
+                    if event:
+                        host.post_tracker_event(event, tracker, self.name)
+
+                    if event and event[0] == 'change' and tracker.take_trigger(host.get_changes_threshold()):
+                        delay = host.get_delay()
+                        host.post_status(f"Waiting {delay}s before screenshot...", self.name)
+                        await asyncio.sleep(delay)
+
+                        host.post_status("Taking screenshot...", self.name)
+                        fullscreen = await run(host.capture_fullscreen)
+                        await run(host.send_to_discord, fullscreen, tracker.last_value)
+                        host.post_change_count(0, self.name)
+                        next_tick = loop.time()
+
+                # Fixed cadence: OCR time is not added on top of the poll interval
+                next_tick += POLL_INTERVAL
+                await asyncio.sleep(max(next_tick - loop.time(), 0))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Monitor error ({self.name}): {e}")
+                await asyncio.sleep(1)
+                next_tick = loop.time()
+
+
+class AsyncMonitorRuntime:
+    """Event loop thread hosting any number of ZoneEngines and webhook uploads"""
+
+    def __init__(self, host, workers=DEFAULT_WORKERS):
+        self.host = host
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='monitor')
+        self.loop = asyncio.new_event_loop()
+        self.tasks = {}
+        self.engines = {}
+        self.sender = AsyncWebhookSender(self)
+        self._thread = threading.Thread(target=self._run_loop, name='monitor-loop', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def start_engine(self, name, zone):
+        """Start monitoring a zone (no-op if an engine with this name is running)"""
+        return self._call(self._start_engine(name, zone))
+
+    def stop_engine(self, name):
+        """Cancel an engine; returns a future that completes once it has stopped"""
+        return self._call(self._stop_engine(name))
+
+    def update_zone(self, name, zone):
+        """Move a running engine to a new zone, applied from its next frame"""
+        def apply():
+            engine = self.engines.get(name)
+            if engine is not None:
+                engine.zone = zone
+        self.loop.call_soon_threadsafe(apply)
+
+    def is_running(self, name):
+        task = self.tasks.get(name)
+        return task is not None and not task.done()
+
+    async def _start_engine(self, name, zone):
+        if self.is_running(name):
+            return
+        engine = ZoneEngine(name, zone, self.host)
+        self.engines[name] = engine
+        self.tasks[name] = self.loop.create_task(engine.run(self.executor), name=f"engine-{name}")
+
+    async def _stop_engine(self, name):
+        task = self.tasks.pop(name, None)
+        self.engines.pop(name, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _shutdown(self):
+        await asyncio.gather(*(self._stop_engine(name) for name in list(self.tasks)))
+        await self.sender.close()
+
+    def close(self, timeout=5):
+        """Cancel all engines, close the HTTP session and stop the loop"""
+        try:
+            self._call(self._shutdown()).result(timeout)
+        except Exception as e:
+            print(f"Error stopping async runtime: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.executor.shutdown(wait=False)
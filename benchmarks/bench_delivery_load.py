@@ -0,0 +1,169 @@
+# bench_delivery_load.py - Load test of the webhook delivery path
+#
+# Drives the app's Outbox + webhook sender at a configurable trigger rate
+# (with optional streak bursts) against the fake Discord webhook, then waits
+# for the queue to drain and reports throughput, latency, drops and retries.
+#
+#   python benchmarks/bench_delivery_load.py --rate 2 --duration 30 --burst 20 --burst-every 10
+#   python benchmarks/bench_delivery_load.py --sender async --workers 4 --profile flaky
+#   python benchmarks/bench_delivery_load.py --url https://discord.com/api/webhooks/...  # real endpoint, careful
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delivery import WebhookSender
+from outbox import Outbox, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, DEFAULT_BASE_DELAY, DEFAULT_MAX_ATTEMPTS
+from fake_webhook import add_server_arguments, server_from_args
+
+
+class CountingSender:
+    """Wraps a sender to count attempts and response codes"""
+
+    def __init__(self, send):
+        self.send = send
+        self.lock = threading.Lock()
+        self.attempts = 0
+        self.codes = {}
+
+    def __call__(self, item):
+        result = self.send(item)
+        with self.lock:
+            self.attempts += 1
+            key = str(result.status_code) if result.status_code else 'error'
+            self.codes[key] = self.codes.get(key, 0) + 1
+        return result
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+def trigger_schedule(rate, duration, burst, burst_every):
+    """Offsets (seconds from start) at which screenshots are queued"""
+    offsets = []
+    if rate > 0:
+        offsets += [i / rate for i in range(int(rate * duration))]
+    if burst > 0 and burst_every > 0:
+        t = burst_every
+        while t <= duration:
+            offsets += [t] * burst
+            t += burst_every
+    return sorted(offsets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test webhook delivery against a fake Discord webhook")
+    parser.add_argument('--rate', type=float, default=1.0, help="Steady screenshot triggers per second")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds of triggering")
+    parser.add_argument('--burst', type=int, default=0, help="Extra triggers queued at once for a streak burst")
+    parser.add_argument('--burst-every', type=float, default=10.0, help="Seconds between bursts")
+    parser.add_argument('--size-kb', type=int, default=800, help="Screenshot size")
+    parser.add_argument('--drain-timeout', type=float, default=120.0, help="Max seconds to wait for the queue")
+    parser.add_argument('--sender', choices=['sync', 'async'], default='sync',
+                        help="requests session (thread runtime) or aiohttp (asyncio runtime)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--base-delay', type=float, default=DEFAULT_BASE_DELAY)
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    parser.add_argument('--url', help="Use this webhook instead of the bundled fake server")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = server_from_args(args)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = server.url
+
+    workdir = tempfile.mkdtemp(prefix='delivery-load-')
+    screenshot = os.path.join(workdir, 'screenshot.png')
+    with open(screenshot, 'wb') as f:
+        f.write(os.urandom(args.size_kb * 1024))
+
+    runtime = None
+    if args.sender == 'async':
+        from async_runtime import AsyncMonitorRuntime
+        runtime = AsyncMonitorRuntime(host=None)
+        base_sender = runtime.sender
+    else:
+        base_sender = WebhookSender()
+    sender = CountingSender(base_sender)
+
+    queued_at = {}
+    latencies = []
+    finished = {'sent': 0, 'dead': 0}
+    done = threading.Event()
+    lock = threading.Lock()
+    schedule = trigger_schedule(args.rate, args.duration, args.burst, args.burst_every)
+
+    def on_result(item, status, result):
+        with lock:
+            finished[status] += 1
+            if status == 'sent':
+                latencies.append(time.perf_counter() - queued_at[item.key])
+            if finished['sent'] + finished['dead'] >= len(schedule):
+                done.set()
+
+    outbox = Outbox(os.path.join(workdir, 'outbox.db'), sender, on_result=on_result,
+                    batch_size=args.batch_size, workers=args.workers, base_delay=args.base_delay,
+                    max_attempts=args.max_attempts)
+    outbox.start()
+
+    print(f"Target: {url}")
+    print(f"Queueing {len(schedule)} screenshots of {args.size_kb} KB over {args.duration:.0f}s "
+          f"({args.rate}/s steady, bursts of {args.burst} every {args.burst_every:.0f}s), "
+          f"sender={args.sender}, workers={args.workers}")
+
+    started = time.perf_counter()
+    for i, offset in enumerate(schedule):
+        wait = started + offset - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        key = f"load-{i}"
+        with lock:
+            queued_at[key] = time.perf_counter()
+        outbox.enqueue(key, url, screenshot, f"Load test {i}")
+    triggering = time.perf_counter() - started
+
+    done.wait(max(args.drain_timeout, 0))
+    elapsed = time.perf_counter() - started
+    outbox.close()
+    if runtime is not None:
+        runtime.close()
+    else:
+        base_sender.close()
+    if server is not None:
+        server.shutdown()
+
+    total = len(schedule)
+    sent = finished['sent']
+    undelivered = total - sent
+    print()
+    print(f"Sent:        {sent}/{total} in {elapsed:.1f}s (triggering took {triggering:.1f}s)")
+    print(f"Throughput:  {sent / max(elapsed, 1e-9):.2f} deliveries/s sustained")
+    print(f"Latency:     p50 {percentile(latencies, 50):.2f}s  p95 {percentile(latencies, 95):.2f}s  "
+          f"p99 {percentile(latencies, 99):.2f}s  max {max(latencies, default=float('nan')):.2f}s")
+    print(f"Drops:       {undelivered} ({undelivered / max(total, 1):.1%}) - {finished['dead']} dead, "
+          f"{undelivered - finished['dead']} still queued at timeout")
+    print(f"Retries:     {sender.attempts - sent - finished['dead']} "
+          f"({sender.attempts} attempts for {total} screenshots)")
+    print(f"Responses:   {dict(sorted(sender.codes.items()))}")
+    if server is not None:
+        print(f"Server saw:  {server.snapshot()['requests']} requests, "
+              f"{server.snapshot()['bytes'] / (1024 * 1024):.1f} MB")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+# bench_memory_soak.py - 24 h soak test of the monitor pipeline's memory use
+#
+# Replays a day's worth of zone frames (one every POLL_INTERVAL) through
+# capture, color mask, upscale, OCR and streak tracking as fast as possible,
+# sampling traced Python memory and RSS along the way. Fails (exit code 1)
+# if memory grows by more than the allowed amount after warm-up.
+#
+#   python benchmarks/bench_memory_soak.py                    # bounded mode, 24 h of frames
+#   python benchmarks/bench_memory_soak.py --mode normal --hours 2
+#   python benchmarks/bench_memory_soak.py --ocr tesseract --hours 0.5
+#
+# By default OCR is replaced by the value drawn into each frame, so a full
+# day replays in minutes; --ocr tesseract runs the real engine.
+import os
+import gc
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+from color_classifier import ColorClassifier
+from recognition import TextReader, ocr_digits
+from tracker import StreakTracker, POLL_INTERVAL
+
+TEXT_COLOR = (253, 140, 94)
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None if unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except Exception:
+            return None
+
+
+def render_frames(width, height, count, seed=0):
+    """Zone captures showing the numbers 0..count-1 in the streak color on a noisy background"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for value in range(count):
+        background = rng.integers(0, 90, size=(height, width, 3), dtype=np.uint8)
+        image = Image.fromarray(background)
+        draw = ImageDraw.Draw(image)
+        draw.text((width // 4, height // 4), str(value), fill=TEXT_COLOR)
+        frames.append(image)
+    return frames
+
+
+class GCTimer:
+    """Total and worst pause of the cyclic garbage collector"""
+
+    def __init__(self):
+        self.started = None
+        self.total = 0.0
+        self.worst = 0.0
+        self.full = 0
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            pause = time.perf_counter() - self.started
+            self.total += pause
+            self.worst = max(self.worst, pause)
+            self.full += info['generation'] == 2
+            self.started = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a day of frames and check that memory stays flat")
+    parser.add_argument('--hours', type=float, default=24.0, help="Monitoring time to replay")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Seconds between frames")
+    parser.add_argument('--mode', choices=['bounded', 'normal'], default='bounded')
+    parser.add_argument('--ocr', choices=['replay', 'tesseract'], default='replay')
+    parser.add_argument('--zone', default='160x48', help="Zone size WxH")
+    parser.add_argument('--change-every', type=int, default=200, help="Frames between streak changes")
+    parser.add_argument('--samples', type=int, default=24)
+    parser.add_argument('--warmup', type=int, default=2000, help="Frames before the baseline is taken")
+    parser.add_argument('--max-growth-kb', type=float, default=256.0, help="Allowed traced memory growth")
+    parser.add_argument('--max-rss-growth-mb', type=float, default=8.0, help="Allowed RSS growth")
+    parser.add_argument('--no-trace', action='store_true', help="Skip tracemalloc (faster, RSS only)")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.zone.lower().split('x'))
+    total = int(args.hours * 3600 / args.interval)
+    templates = render_frames(width, height, 100)
+    shown = {'value': '0'}
+    ocr = ocr_digits if args.ocr == 'tesseract' else (lambda image: shown['value'])
+    reader = TextReader(ColorClassifier(), bounded=args.mode == 'bounded', ocr=ocr)
+    tracker = StreakTracker()
+
+    gc_timer = GCTimer()
+    gc.callbacks.append(gc_timer)
+    if args.mode == 'bounded':
+        gc.collect()
+        gc.freeze()
+    if not args.no_trace:
+        tracemalloc.start()
+
+    print(f"Replaying {total} frames ({args.hours:g} h at {args.interval}s), zone {width}x{height}, "
+          f"mode={args.mode}, ocr={args.ocr}")
+    sample_every = max(1, (total - args.warmup) // max(args.samples, 1))
+    samples = []
+    changes = triggers = 0
+    started = time.perf_counter()
+    for frame in range(total):
+        value = frame // args.change_every
+        shown['value'] = str(value)
+        capture = templates[value % len(templates)].copy()  # Like ImageGrab: a new image per frame
+        try:
+            detected = reader.read(capture)
+        finally:
+            capture.close()
+        if detected:
+            event = tracker.update(detected)
+            if event and event[0] == 'change':
+                changes += 1
+                triggers += tracker.take_trigger(5)
+
+        if frame >= args.warmup and (frame - args.warmup) % sample_every == 0 or frame == total - 1:
+            gc.callbacks.remove(gc_timer)  # Not counting the collections made for sampling
+            gc.collect()
+            gc.callbacks.append(gc_timer)
+            traced = tracemalloc.get_traced_memory()[0] / 1024 if not args.no_trace else None
+            samples.append((frame, traced, current_rss_mb(), time.perf_counter() - started))
+    elapsed = time.perf_counter() - started
+    gc.callbacks.remove(gc_timer)
+
+    print()
+    print(f"{'frame':>9} {'hours':>6} {'traced KiB':>11} {'RSS MB':>8} {'elapsed s':>10}")
+    for frame, traced, rss, at in samples:
+        print(f"{frame:>9} {frame * args.interval / 3600:>6.1f} "
+              f"{'-' if traced is None else f'{traced:.1f}':>11} {'-' if rss is None else f'{rss:.1f}':>8} {at:>10.1f}")
+
+    print()
+    print(f"{total} frames in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} frames/s), "
+          f"{changes} changes, {triggers} screenshot triggers")
+    print(f"GC: {gc_timer.total * 1000:.0f} ms total, worst pause {gc_timer.worst * 1000:.2f} ms, "
+          f"{gc_timer.full} full collections")
+
+    failures = []
+    if samples and samples[0][1] is not None:
+        growth = max(s[1] for s in samples) - samples[0][1]
+        print(f"Traced memory growth after warm-up: {growth:.1f} KiB (limit {args.max_growth_kb:g})")
+        if growth > args.max_growth_kb:
+            failures.append("traced memory")
+    if samples and samples[0][2] is not None:
+        growth = samples[-1][2] - samples[0][2]
+        print(f"RSS growth after warm-up: {growth:.1f} MB (limit {args.max_rss_growth_mb:g})")
+        if growth > args.max_rss_growth_mb:
+            failures.append("RSS")
+    if failures:
+        print(f"FAIL: {' and '.join(failures)} grew")
+        sys.exit(1)
+    print("PASS: memory flat")
+
+
+if __name__ == '__main__':
+    main()
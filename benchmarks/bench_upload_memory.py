@@ -0,0 +1,152 @@
+# bench_upload_memory.py - Peak memory of screenshot upload paths
+#
+# Uploads a synthetic multi-monitor screenshot to the local fake webhook
+# using the old in-memory path (BytesIO + requests files=) and the paths the
+# app ships: the archive writes the PNG to disk, then delivery.send_file
+# (thread runtime) or the aiohttp sender (asyncio runtime) streams it. Each
+# mode runs in its own process so the peak RSS of one does not hide the
+# other.
+#
+#   python benchmarks/bench_upload_memory.py [--width 7680] [--height 2160]
+import os
+import io
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_webhook import FakeWebhookServer
+
+MODES = ('legacy', 'sync', 'async')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return None
+
+
+def make_screenshot(width, height, strip=64):
+    """Noisy gradient frame so PNG compression does not make it trivially small.
+
+    Built in strips so creating it does not raise peak RSS above the frame itself.
+    """
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    image = Image.new('RGB', (width, height))
+    ramp = (np.arange(width) * 255 // max(width - 1, 1)).astype(np.uint8)
+    for y in range(0, height, strip):
+        rows = min(strip, height - y)
+        block = np.empty((rows, width, 3), dtype=np.uint8)
+        block[..., 0] = ramp
+        block[..., 1] = (y * 255 // max(height - 1, 1))
+        block[..., 2] = rng.integers(0, 256, size=(rows, width), dtype=np.uint8)
+        image.paste(Image.fromarray(block), (0, y))
+    return image
+
+
+def run_mode(mode, url, width, height):
+    import requests
+    from archive import ScreenshotArchive
+    from delivery import send_file
+    from outbox import OutboxItem
+
+    image = make_screenshot(width, height)
+    workdir = tempfile.mkdtemp(prefix='upload-bench-')
+    runtime = None
+    if mode == 'async':
+        from async_runtime import AsyncMonitorRuntime
+        runtime = AsyncMonitorRuntime(host=None)
+    baseline = peak_rss_mb()
+    tracemalloc.start()
+
+    try:
+        if mode == 'legacy':
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG')
+            buffer.seek(0)
+            image.close()
+            files = {'file': ('screenshot.png', buffer, 'image/png')}
+            status = requests.post(url, data={'content': 'bench'}, files=files).status_code
+        else:
+            # Same path as send_to_discord: archive writer encodes to disk, the outbox sends the file
+            archive = ScreenshotArchive(workdir)
+            record = archive.submit(image, 'bench').result()
+            archive.close()
+            if mode == 'sync':
+                result = send_file(url, record.path, 'bench')
+            else:
+                result = runtime.sender(OutboxItem(None, 'bench', url, record.path, 'bench', None, False, 0))
+            status = result.status_code or result.error
+
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = peak_rss_mb()
+    finally:
+        if runtime is not None:
+            runtime.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'mode': mode,
+        'status': status,
+        'traced_peak_mb': round(traced_peak / (1024 * 1024), 1),
+        'rss_after_frame_mb': None if baseline is None else round(baseline, 1),
+        'rss_peak_mb': None if peak is None else round(peak, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of screenshot upload paths")
+    parser.add_argument('--width', type=int, default=7680)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--url')
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.url, args.width, args.height)))
+        return
+
+    server = FakeWebhookServer(profile='instant', bucket_limit=10 ** 9, global_limit=0, max_upload=None)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = server.url
+
+    print(f"Frame: {args.width}x{args.height} RGB ({args.width * args.height * 3 / (1024 * 1024):.0f} MB raw)")
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--url', url,
+             '--width', str(args.width), '--height', str(args.height)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{mode:>10}: python peak {result['traced_peak_mb']:>7} MB, "
+              f"RSS {result['rss_after_frame_mb']} -> {result['rss_peak_mb']} MB (status {result['status']})")
+    server.shutdown()
+
+    legacy = results[0]
+    failed = [r['mode'] for r in results[1:] if r['traced_peak_mb'] >= legacy['traced_peak_mb']]
+    if failed:
+        print(f"FAIL: {', '.join(failed)} upload did not reduce peak memory")
+        sys.exit(1)
+    print("OK: shipped upload paths keep the encoded screenshot and request body out of memory")
+
+
+if __name__ == '__main__':
+    main()
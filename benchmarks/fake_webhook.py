@@ -0,0 +1,230 @@
+# fake_webhook.py - Local stand-in for Discord webhooks for delivery load tests
+#
+# Mimics what matters to the delivery path: 204/200 responses, per-webhook
+# rate limit buckets with X-RateLimit-* headers, 429 + retry_after, the
+# attachment size limit (413), unknown webhooks (404), random 5xx errors and
+# configurable latency.
+#
+#   python benchmarks/fake_webhook.py --port 8099 --profile discord
+#   -> webhook URL http://127.0.0.1:8099/api/webhooks/1/token, stats at /stats
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# name: (median latency s, jitter sigma for lognormal, 5xx error rate)
+LATENCY_PROFILES = {
+    'instant': (0.0, 0.0, 0.0),
+    'fast': (0.01, 0.3, 0.0),
+    'discord': (0.12, 0.5, 0.002),
+    'slow': (0.5, 0.6, 0.01),
+    'flaky': (0.2, 0.8, 0.05),
+}
+
+WEBHOOK_PATH = re.compile(r'^/api/webhooks/(\d+)/([\w-]+)')
+
+
+class Bucket:
+    """Fixed-window rate limit like Discord's per-webhook bucket"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.reset_at = 0.0
+        self.remaining = limit
+
+    def take(self, now):
+        """Returns (allowed, remaining, reset_after)"""
+        if now >= self.reset_at:
+            self.reset_at = now + self.window
+            self.remaining = self.limit
+        reset_after = self.reset_at - now
+        if self.remaining <= 0:
+            return False, 0, reset_after
+        self.remaining -= 1
+        return True, self.remaining, reset_after
+
+
+class FakeWebhookServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the simulated Discord state and counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), profile='discord', bucket_limit=5, bucket_window=2.0,
+                 global_limit=50, max_upload=10 * 1024 * 1024, webhook_ids=None, seed=None):
+        super().__init__(address, FakeWebhookHandler)
+        self.latency, self.sigma, self.error_rate = LATENCY_PROFILES[profile]
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.global_bucket = Bucket(global_limit, 1.0) if global_limit else None
+        self.max_upload = max_upload
+        self.webhook_ids = set(webhook_ids) if webhook_ids else None
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.stats = {'requests': 0, 'bytes': 0, 'status': {}}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/webhooks/1/token"
+
+    def delay(self):
+        if self.latency <= 0:
+            return 0.0
+        with self.lock:
+            return self.random.lognormvariate(0, self.sigma) * self.latency if self.sigma else self.latency
+
+    def record(self, status, size):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += size
+            self.stats['status'][str(status)] = self.stats['status'].get(str(status), 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+class FakeWebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so clients can reuse connections
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=None, headers=None, size=0):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        if payload:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+        self.server.record(status, size)
+
+    def _drain_body(self):
+        """Read and discard the request body, returns its size"""
+        size = 0
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                chunk_size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if chunk_size == 0:
+                    self.rfile.readline()
+                    break
+                remaining = chunk_size
+                while remaining:
+                    remaining -= len(self.rfile.read(min(remaining, 65536)))
+                self.rfile.readline()
+                size += chunk_size
+            return size
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 65536))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            size += len(chunk)
+        return size
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._reply(200, self.server.snapshot())
+        else:
+            self._reply(404, {'message': '404: Not Found', 'code': 0})
+
+    def do_POST(self):
+        server = self.server
+        match = WEBHOOK_PATH.match(self.path)
+        size = self._drain_body()
+        if server.max_upload and size > server.max_upload:
+            self._reply(413, {'message': 'Request entity too large', 'code': 40005}, size=size)
+            return
+
+        if match is None or (server.webhook_ids is not None and match.group(1) not in server.webhook_ids):
+            self._reply(404, {'message': 'Unknown Webhook', 'code': 10015}, size=size)
+            return
+
+        time.sleep(server.delay())
+        now = time.monotonic()
+        with server.lock:
+            global_allowed, _, global_reset = (True, 0, 0) if server.global_bucket is None else \
+                server.global_bucket.take(now)
+            if global_allowed:
+                bucket = server.buckets.setdefault(match.group(1), Bucket(server.bucket_limit, server.bucket_window))
+                allowed, remaining, reset_after = bucket.take(now)
+            failed = server.error_rate and server.random.random() < server.error_rate
+            error_code = server.random.choice((500, 502, 503))
+
+        if not global_allowed:
+            self._reply(429, {'message': 'You are being rate limited.', 'retry_after': round(global_reset, 3),
+                              'global': True},
+                        headers={'Retry-After': f"{global_reset:.3f}", 'X-RateLimit-Global': 'true',
+                                 'X-RateLimit-Scope': 'global'}, size=size)
+            return
+
+        headers = {
+            'X-RateLimit-Limit': server.bucket_limit,
+            'X-RateLimit-Remaining': remaining,
+            'X-RateLimit-Reset-After': f"{reset_after:.3f}",
+            'X-RateLimit-Bucket': f"webhook-{match.group(1)}",
+        }
+        if not allowed:
+            headers['Retry-After'] = f"{reset_after:.3f}"
+            headers['X-RateLimit-Scope'] = 'user'
+            self._reply(429, {'message': 'You are being rate limited.', 'retry_after': round(reset_after, 3),
+                              'global': False}, headers=headers, size=size)
+        elif failed:
+            self._reply(error_code, {'message': 'Internal Server Error', 'code': 0}, size=size)
+        elif 'wait=true' in self.path:
+            self._reply(200, {'id': str(int(time.time() * 1000)), 'type': 0, 'webhook_id': match.group(1)},
+                        headers=headers, size=size)
+        else:
+            self._reply(204, headers=headers, size=size)
+
+
+def add_server_arguments(parser):
+    """Server options shared with the load generator"""
+    parser.add_argument('--profile', choices=sorted(LATENCY_PROFILES), default='discord')
+    parser.add_argument('--bucket-limit', type=int, default=5, help="Requests per bucket window per webhook")
+    parser.add_argument('--bucket-window', type=float, default=2.0, help="Bucket window in seconds")
+    parser.add_argument('--global-limit', type=int, default=50, help="Requests per second across webhooks (0 = off)")
+    parser.add_argument('--max-upload-mb', type=float, default=10.0, help="Attachment size limit")
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def server_from_args(args, address=('127.0.0.1', 0)):
+    return FakeWebhookServer(
+        address, profile=args.profile, bucket_limit=args.bucket_limit, bucket_window=args.bucket_window,
+        global_limit=args.global_limit, max_upload=int(args.max_upload_mb * 1024 * 1024), seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Discord webhook server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, (args.host, args.port))
+    print(f"Fake webhook: {server.url}")
+    print(f"Stats: http://{args.host}:{server.server_address[1]}/stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.snapshot(), indent=2))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
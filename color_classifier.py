@@ -0,0 +1,174 @@
+# color_classifier.py - Precomputed color lookup table for text masking
+import os
+import json
+import hashlib
+import numpy as np
+
+# Streak number orange: #FD8C5E = RGB(253, 140, 94). The default box is
+# centred one step up in blue so it covers exactly the original ranges
+# R 210-255, G 100-180, B 50-140.
+DEFAULT_TARGET_COLORS = [(253, 140, 95)]
+DEFAULT_TOLERANCE = (43, 40, 45)  # Per channel for 'box', single value for 'rgb'/'lab'
+DEFAULT_METRIC = 'box'
+DEFAULT_BITS = 8  # Exact: 16M entries (2 MB packed on disk); fewer bits blur the box edges
+
+METRICS = ('box', 'rgb', 'lab')
+LUT_VERSION = 1
+
+
+def rgb_to_lab(rgb):
+    """Convert an (..., 3) array of sRGB values (0-255) to CIE Lab (D65)"""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    m = np.array([
+        [0.4124, 0.3576, 0.1805],
+        [0.2126, 0.7152, 0.0722],
+        [0.0193, 0.1192, 0.9505],
+    ])
+    xyz = (c @ m.T) / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def normalize_params(target_colors=None, tolerance=None, metric=DEFAULT_METRIC, bits=DEFAULT_BITS):
+    """Validate classifier settings and return them in canonical form"""
+    targets = [[int(v) for v in c] for c in (target_colors or DEFAULT_TARGET_COLORS)]
+    tolerance = DEFAULT_TOLERANCE if tolerance is None else tolerance
+    bits = int(bits)
+
+    if metric not in METRICS:
+        raise ValueError(f"Unknown color metric: {metric}")
+    if not 1 <= bits <= 8:
+        raise ValueError("LUT bits must be between 1 and 8")
+    for color in targets:
+        if len(color) != 3 or not all(0 <= v <= 255 for v in color):
+            raise ValueError(f"Invalid target color: {color}")
+    if isinstance(tolerance, (list, tuple)):
+        if metric != 'box' or len(tolerance) != 3:
+            raise ValueError("Per-channel tolerance is only supported by the 'box' metric")
+        tolerance = [float(v) for v in tolerance]
+    else:
+        tolerance = float(tolerance)
+
+    return {'targets': targets, 'tolerance': tolerance, 'metric': metric, 'bits': bits}
+
+
+def make_key(params):
+    """Stable cache key for a set of normalized parameters"""
+    blob = json.dumps({'v': LUT_VERSION, **params}, sort_keys=True)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()[:16]
+
+
+class ColorClassifier:
+    """Classifies pixels as text/background with a single LUT lookup per pixel.
+
+    The RGB cube is quantized to `bits` per channel (8 = full 16M entries) and
+    every cell is tested once against the target colors. The table is cached
+    on disk under a key derived from its parameters.
+    """
+
+    def __init__(self, target_colors=None, tolerance=None, metric=DEFAULT_METRIC,
+                 bits=DEFAULT_BITS, cache_dir=None):
+        self.params = normalize_params(target_colors, tolerance, metric, bits)
+        self.key = make_key(self.params)
+        self.bits = self.params['bits']
+        self.levels = 1 << self.bits
+        self.shift = 8 - self.bits
+        self.cache_dir = cache_dir
+        self.lut = self._load_or_build()
+
+    def matches(self, target_colors=None, tolerance=None, metric=DEFAULT_METRIC, bits=DEFAULT_BITS):
+        """Check whether this classifier was built from the given settings"""
+        try:
+            return make_key(normalize_params(target_colors, tolerance, metric, bits)) == self.key
+        except (TypeError, ValueError):
+            return False
+
+    def _cache_path(self):
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"lut_{self.key}.npy")
+
+    def _load_or_build(self):
+        path = self._cache_path()
+        size = self.levels ** 3
+        if path and os.path.exists(path):
+            try:
+                packed = np.load(path)
+                lut = np.unpackbits(packed, count=size).astype(bool)
+                if lut.size == size:
+                    return lut
+            except Exception as e:
+                print(f"Error loading color LUT: {e}")
+
+        lut = self._build()
+
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.packbits(lut))
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"Error saving color LUT: {e}")
+        return lut
+
+    def _build(self):
+        """Evaluate the distance test for the center of every quantized cell"""
+        levels = self.levels
+        step = 256 // levels
+        centers = np.arange(levels, dtype=np.float64) * step + (step - 1) / 2
+
+        # One red slice at a time keeps the temporary arrays small at 8 bits
+        gg, bb = np.meshgrid(centers, centers, indexing='ij')
+        lut = np.zeros((levels, levels * levels), dtype=bool)
+        metric = self.params['metric']
+        tolerance = self.params['tolerance']
+        targets = np.array(self.params['targets'], dtype=np.float64)
+        if metric == 'lab':
+            targets = rgb_to_lab(targets)
+
+        for ri, r in enumerate(centers):
+            cell = np.stack([np.full_like(gg, r), gg, bb], axis=-1).reshape(-1, 3)
+            if metric == 'lab':
+                cell = rgb_to_lab(cell)
+            hit = np.zeros(cell.shape[0], dtype=bool)
+            for target in targets:
+                diff = np.abs(cell - target)
+                if metric == 'box':
+                    tol = tolerance if isinstance(tolerance, list) else [tolerance] * 3
+                    hit |= (diff[:, 0] <= tol[0]) & (diff[:, 1] <= tol[1]) & (diff[:, 2] <= tol[2])
+                else:
+                    hit |= np.einsum('ij,ij->i', diff, diff) <= tolerance ** 2
+            lut[ri] = hit
+        return lut.reshape(-1)
+
+    def mask(self, img_array, out=None, index=None, channel=None):
+        """Return a boolean mask of pixels matching any target color.
+
+        Given `out` (bool) and `index`/`channel` (intp) arrays of the image's
+        height x width, the lookup runs in place without allocating.
+        """
+        rgb = img_array[..., :3]
+        if out is not None:
+            np.copyto(index, rgb[..., 0], casting='unsafe')
+            np.right_shift(index, self.shift, out=index)
+            np.left_shift(index, 2 * self.bits, out=index)
+            for ch, bits in ((1, self.bits), (2, 0)):
+                np.copyto(channel, rgb[..., ch], casting='unsafe')
+                np.right_shift(channel, self.shift, out=channel)
+                if bits:
+                    np.left_shift(channel, bits, out=channel)
+                np.bitwise_or(index, channel, out=index)
+            return np.take(self.lut, index, out=out)
+        if self.shift:
+            rgb = rgb >> self.shift
+        index = rgb[..., 0].astype(np.intp) << (2 * self.bits)
+        index |= rgb[..., 1].astype(np.intp) << self.bits
+        index |= rgb[..., 2]
+        return self.lut[index]
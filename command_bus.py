@@ -0,0 +1,76 @@
+# command_bus.py - Runs commands from hotkeys, buttons and monitor engines on the Tk thread
+import queue
+import threading
+
+DRAIN_INTERVAL_MS = 30  # How often the Tk thread checks for new commands
+MAX_PER_DRAIN = 200  # Commands handled per tick, so a flood cannot freeze the UI
+
+
+class CommandBus:
+    """Queue of (name, args) commands drained by the Tk event loop.
+
+    post() only appends to a queue, so it is cheap and safe from any thread
+    (keyboard hook, monitor thread, asyncio loop, outbox flusher). Handlers
+    always run on the Tk thread and may touch widgets and messagebox.
+    post_latest() keeps only the newest pending command per key, for
+    per-frame updates such as the detected value that would otherwise pile
+    up faster than the UI shows them.
+    """
+
+    def __init__(self, root, interval_ms=DRAIN_INTERVAL_MS, max_per_drain=MAX_PER_DRAIN):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_per_drain = max_per_drain
+        self.handlers = {}
+        self._queue = queue.SimpleQueue()
+        self._latest = {}
+        self._latest_lock = threading.Lock()
+        self._after_id = None
+
+    def register(self, name, handler):
+        self.handlers[name] = handler
+
+    def post(self, name, *args):
+        """Queue a command (safe from any thread)"""
+        self._queue.put((name, args))
+
+    def post_latest(self, key, name, *args):
+        """Queue a command, replacing a still pending one with the same key"""
+        with self._latest_lock:
+            pending = key in self._latest
+            self._latest[key] = (name, args)
+        if not pending:
+            self._queue.put((None, key))  # Placeholder keeps the command's place in the queue
+
+    def start(self):
+        """Start draining on the Tk thread"""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _drain(self):
+        for _ in range(self.max_per_drain):
+            try:
+                name, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if name is None:
+                with self._latest_lock:
+                    name, args = self._latest.pop(args)
+            self.dispatch(name, args)
+        self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def dispatch(self, name, args=()):
+        """Run a command's handler now (Tk thread only)"""
+        handler = self.handlers.get(name)
+        if handler is None:
+            print(f"Unknown command: {name}")
+            return
+        try:
+            handler(*args)
+        except Exception as e:
+            print(f"Command '{name}' failed: {e}")
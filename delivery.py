@@ -0,0 +1,170 @@
+# delivery.py - Streaming screenshot upload to Discord webhooks
+import os
+import uuid
+import requests
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_size(fileobj):
+    """Size of a seekable file object without reading it"""
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size - position
+
+
+class MultipartStream:
+    """File-like multipart/form-data body that is read in chunks.
+
+    Only the small text parts are kept in memory; the file part is copied
+    from `fileobj` CHUNK_SIZE bytes at a time while the request is sent.
+    The length is known up front, so the upload uses Content-Length
+    instead of chunked transfer encoding.
+    """
+
+    def __init__(self, fields, file_field, filename, fileobj, content_type='application/octet-stream',
+                 chunk_size=CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.chunk_size = chunk_size
+
+        head = b''
+        for name, value in fields.items():
+            head += (
+                f"--{self.boundary}\r\n"
+                f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+            ).encode('utf-8') + str(value).encode('utf-8') + b"\r\n"
+        head += (
+            f"--{self.boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"{file_field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode('utf-8')
+        tail = f"\r\n--{self.boundary}--\r\n".encode('utf-8')
+
+        self._parts = [head, fileobj, tail]
+        self._index = 0
+        self._offset = 0
+        self.len = len(head) + file_size(fileobj) + len(tail)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+        out = []
+        remaining = size
+        while remaining > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                chunk = part[self._offset:self._offset + remaining]
+                self._offset += len(chunk)
+                if self._offset >= len(part):
+                    self._index += 1
+                    self._offset = 0
+            else:
+                chunk = part.read(min(remaining, self.chunk_size))
+                if not chunk:
+                    self._index += 1
+                    continue
+            out.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(out)
+
+
+def post_file(webhook_url, fileobj, message, filename='screenshot.png', timeout=30, session=None):
+    """Stream a file and message to a Discord webhook, returns the response"""
+    body = MultipartStream({'content': message}, 'file', filename, fileobj, 'image/png')
+    post = session.post if session is not None else requests.post
+    return post(webhook_url, data=body, headers={'Content-Type': body.content_type}, timeout=timeout)
+
+
+class DeliveryResult:
+    """Outcome of one webhook delivery attempt"""
+
+    __slots__ = ('ok', 'status_code', 'retry_after', 'permanent', 'error')
+
+    def __init__(self, ok, status_code=None, retry_after=None, permanent=False, error=None):
+        self.ok = ok
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.permanent = permanent
+        self.error = error
+
+
+def parse_retry_after(headers, body=None):
+    """Seconds to wait from a 429 response (headers or Discord JSON body)"""
+    for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+        value = headers.get(header)
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    try:
+        return float(body.get('retry_after'))
+    except Exception:
+        return None
+
+
+def bucket_empty(headers):
+    """True if the rate limit headers say no requests are left in this window"""
+    return headers.get('X-RateLimit-Remaining') == '0'
+
+
+def classify_response(code, retry_after=None):
+    """DeliveryResult for a webhook HTTP status code"""
+    if code in (200, 204):
+        # retry_after on success means the bucket is empty: pace the next send
+        return DeliveryResult(True, code, retry_after=retry_after)
+    if code == 429:
+        return DeliveryResult(False, code, retry_after=retry_after, error="Rate limited")
+    # Other 4xx (bad webhook, payload too large) will not succeed on retry
+    return DeliveryResult(False, code, permanent=400 <= code < 500, error=f"Webhook error: {code}")
+
+
+def is_transient(result):
+    """True for failures that go away on their own: network errors, 5xx and rate limits"""
+    return not result.ok and (result.status_code is None or result.status_code == 429 or result.status_code >= 500)
+
+
+def send_file(webhook_url, path, message, timeout=30, session=None):
+    """Send a file from disk to a webhook and classify the response"""
+    try:
+        with open(path, 'rb') as f:
+            response = post_file(webhook_url, f, message, timeout=timeout, session=session)
+    except FileNotFoundError as e:
+        return DeliveryResult(False, permanent=True, error=str(e))
+    except (requests.RequestException, OSError) as e:
+        return DeliveryResult(False, error=str(e))
+
+    retry_after = None
+    if response.status_code == 429:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        retry_after = parse_retry_after(response.headers, body)
+    elif bucket_empty(response.headers):
+        retry_after = parse_retry_after(response.headers)
+    return classify_response(response.status_code, retry_after)
+
+
+class WebhookSender:
+    """Sends outbox items over one pooled HTTP session"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def __call__(self, item):
+        return send_file(item.webhook_url, item.file_path, item.message, timeout=self.timeout, session=self.session)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,198 @@
+# memory_diagnostics.py - Allocation sites per monitor pipeline stage (tracemalloc)
+#
+# Runs the monitor pipeline (capture, color mask, upscale, OCR, tracking) for
+# a number of frames under tracemalloc and reports for every stage how much
+# it allocates per call and which source lines keep memory alive.
+#
+#   python memory_diagnostics.py --frames 300                        # live screen, zone from config.json
+#   python memory_diagnostics.py --source session.mp4 --frames 2000 --memory-mode bounded
+import os
+import gc
+import sys
+import time
+import argparse
+import itertools
+import tracemalloc
+from contextlib import contextmanager
+from PIL import Image, ImageGrab
+from color_classifier import ColorClassifier
+from recognition import TextReader
+from settings import SettingsStore, MEMORY_MODES, get_config_path, get_cache_dir, parse_zone
+from tracker import StreakTracker
+
+STAGES = ('capture', 'mask', 'upscale', 'ocr', 'track')
+IGNORED_FILES = (tracemalloc.__file__, os.path.abspath(__file__))
+
+
+def format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024 or unit == 'MiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class StageProfiler:
+    """Attributes tracemalloc allocations to named pipeline stages.
+
+    Every stage call records the net change and the transient peak of traced
+    memory. On every `sample_every`th frame the stage is also bracketed by
+    snapshots and the growth per source line is summed, which points at the
+    sites that keep memory alive.
+    """
+
+    def __init__(self, sample_every=10, depth=1):
+        self.sample_every = max(1, sample_every)
+        self.depth = depth
+        self.frame = 0
+        self.stats = {}  # stage -> [calls, net bytes, max transient peak]
+        self.sites = {}  # stage -> {site: [bytes, blocks]}
+
+    def start(self):
+        tracemalloc.start(self.depth)
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def next_frame(self):
+        self.frame += 1
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, path) for path in IGNORED_FILES]
+        )
+
+    @contextmanager
+    def stage(self, name):
+        before = self._snapshot() if self.frame % self.sample_every == 0 else None
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            entry = self.stats.setdefault(name, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += current - start
+            entry[2] = max(entry[2], peak - start)
+            if before is not None:
+                sites = self.sites.setdefault(name, {})
+                for diff in self._snapshot().compare_to(before, 'lineno'):
+                    if diff.size_diff > 0:
+                        site = sites.setdefault(str(diff.traceback[0]), [0, 0])
+                        site[0] += diff.size_diff
+                        site[1] += diff.count_diff
+
+    def report(self, top=5):
+        """Per-stage table plus the top allocation sites of each stage"""
+        lines = [f"{'Stage':<10} {'calls':>8} {'net/call':>12} {'max peak':>12}"]
+        order = [s for s in STAGES if s in self.stats] + [s for s in self.stats if s not in STAGES]
+        for name in order:
+            calls, net, peak = self.stats[name]
+            lines.append(f"{name:<10} {calls:>8} {format_bytes(net / max(calls, 1)):>12} {format_bytes(peak):>12}")
+        samples = (self.frame + self.sample_every - 1) // self.sample_every
+        lines.append("")
+        lines.append(f"Top allocation sites still alive at the end of a stage ({samples} sampled frames):")
+        for name in order:
+            sites = sorted(self.sites.get(name, {}).items(), key=lambda item: item[1][0], reverse=True)[:top]
+            lines.append(f"  {name}:")
+            if not sites:
+                lines.append("    (nothing retained)")
+            for site, (size, blocks) in sites:
+                lines.append(f"    {format_bytes(size):>10} in {blocks:>5} blocks  {site}")
+        return "\n".join(lines)
+
+
+def screen_frames(zone, interval):
+    """Grab the zone from the screen forever, like the monitor loop"""
+    while True:
+        yield ImageGrab.grab(bbox=zone)
+        if interval:
+            time.sleep(interval)
+
+
+def recorded_frames(source, zone):
+    """Replay the zone of a video or image folder forever"""
+    from analyze_recordings import iter_image_frames, iter_video_frames
+    while True:
+        if os.path.isdir(source):
+            frames = iter_image_frames(source, zone, 1, 1.0)
+        else:
+            frames = iter_video_frames(source, zone, 1)
+        empty = True
+        for _, _, crop in frames:
+            empty = False
+            yield Image.fromarray(crop)
+        if empty:
+            sys.exit(f"No frames in {source}")
+
+
+def run_pipeline(frames, reader, profiler, count):
+    """Push `count` frames through capture, recognition and tracking under the profiler"""
+    tracker = StreakTracker()
+    frames = iter(frames)
+    for _ in range(count):
+        with profiler.stage('capture'):
+            image = next(frames)
+        try:
+            detected = reader.read(image, profiler.stage)
+        finally:
+            image.close()
+        with profiler.stage('track'):
+            if detected:
+                tracker.update(detected)
+        profiler.next_frame()
+    return tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report allocation sites per monitor pipeline stage")
+    parser.add_argument('--source', help="Video file or image folder to replay (default: live screen)")
+    parser.add_argument('--zone', help="x1,y1,x2,y2 (default: zone from config.json)")
+    parser.add_argument('--config', default=get_config_path())
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--interval', type=float, default=0.0, help="Seconds between live captures")
+    parser.add_argument('--memory-mode', choices=MEMORY_MODES, help="Default: memory_mode from config.json")
+    parser.add_argument('--sample-every', type=int, default=10, help="Take snapshots every Nth frame")
+    parser.add_argument('--top', type=int, default=5, help="Allocation sites shown per stage")
+    args = parser.parse_args()
+
+    settings = SettingsStore(args.config).settings
+    try:
+        zone = parse_zone(args.zone.split(',')) if args.zone else settings.zone
+    except ValueError as e:
+        sys.exit(str(e))
+    if zone is None:
+        sys.exit("No zone given and none selected in config.json (use --zone x1,y1,x2,y2)")
+
+    classifier = ColorClassifier(settings.target_colors, settings.color_tolerance, settings.color_metric,
+                                 settings.lut_bits, cache_dir=get_cache_dir())
+    mode = args.memory_mode or settings.memory_mode
+    reader = TextReader(classifier, bounded=mode == 'bounded')
+    frames = recorded_frames(args.source, zone) if args.source else screen_frames(zone, args.interval)
+
+    # Warm up caches and buffers outside the measurement
+    for image in itertools.islice(frames, 3):
+        reader.read(image)
+        image.close()
+    gc.collect()
+
+    profiler = StageProfiler(sample_every=args.sample_every)
+    collections = sum(s['collections'] for s in gc.get_stats())
+    profiler.start()
+    started = time.perf_counter()
+    try:
+        run_pipeline(frames, reader, profiler, args.frames)
+        traced, peak = tracemalloc.get_traced_memory()
+    finally:
+        profiler.stop()
+    elapsed = time.perf_counter() - started
+    collections = sum(s['collections'] for s in gc.get_stats()) - collections
+
+    print(f"{args.frames} frames, memory mode '{mode}', zone {zone}, {elapsed:.1f}s (with tracing)")
+    print(f"Traced memory at end {format_bytes(traced)}, peak {format_bytes(peak)}, {collections} GC runs")
+    print()
+    print(profiler.report(args.top))
+
+
+if __name__ == '__main__':
+    main()
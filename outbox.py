@@ -0,0 +1,278 @@
+# outbox.py - Durable webhook delivery queue backed by SQLite (WAL mode)
+import os
+import time
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from delivery import DeliveryResult, is_transient
+
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_WORKERS = 2
+DEFAULT_BASE_DELAY = 2.0
+DEFAULT_MAX_DELAY = 300.0
+DEFAULT_MAX_ATTEMPTS = 12  # Only for unexpected responses; outages and 5xx are retried indefinitely
+DEFAULT_KEEP_SENT_DAYS = 7
+PURGE_INTERVAL = 3600.0  # Seconds between purges of old sent items
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    webhook_url TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    message TEXT NOT NULL,
+    capture_id INTEGER,
+    owns_file INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox(status, next_attempt_at);
+"""
+
+
+class OutboxItem:
+    """One queued delivery"""
+
+    __slots__ = ('id', 'key', 'webhook_url', 'file_path', 'message', 'capture_id', 'owns_file', 'attempts')
+
+    def __init__(self, id, key, webhook_url, file_path, message, capture_id, owns_file, attempts):
+        self.id = id
+        self.key = key
+        self.webhook_url = webhook_url
+        self.file_path = file_path
+        self.message = message
+        self.capture_id = capture_id
+        self.owns_file = owns_file
+        self.attempts = attempts
+
+
+class Outbox:
+    """Persistent queue of webhook deliveries drained by a background flusher.
+
+    Every delivery is committed to disk before the first send attempt, so
+    nothing is lost on a crash or while offline. The flusher claims due
+    items in batches, sends them through `send(item) -> DeliveryResult`,
+    and commits all outcomes of a batch in one transaction. A network error
+    or 5xx pauses the whole queue, with exponential backoff up to max_delay;
+    when the pause ends a single item is sent as a probe, and the first
+    success resumes full batches and resets the backoff. Items that were
+    not attempted while paused keep their attempts. Outages are waited out
+    for as long as it takes, so an offline period never kills an item; only
+    permanent 4xx errors, or max_attempts of other unexpected responses
+    (retried per item with backoff), mark it dead. A 429, or a response
+    saying the rate limit bucket is empty, pauses the queue until the
+    bucket resets.
+    Each item has a unique key, so enqueueing the same delivery twice is a
+    no-op. Sent items are purged after keep_sent_days. Delivery is at-least-once: an item that was in flight when the
+    app stopped is sent again on the next start.
+    """
+
+    def __init__(self, path, send, on_result=None, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 keep_sent_days=DEFAULT_KEEP_SENT_DAYS):
+        self.path = path
+        self.send = send
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.workers = workers
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.keep_sent_days = keep_sent_days
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        with self._db:
+            # Items that were in flight when the app stopped are sent again
+            self._db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'inflight'")
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._paused_until = 0.0
+        self._outage = 0  # Transient failures in a row, sets the pause length
+        self._outage_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the background flusher"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._flush_loop, name='outbox-flusher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the flusher; unsent items stay queued for the next start"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def enqueue(self, key, webhook_url, file_path, message, capture_id=None, owns_file=False):
+        """Durably queue a delivery, returns False if the key was already queued"""
+        now = time.time()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO outbox (key, webhook_url, file_path, message, capture_id, owns_file, "
+                "next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, webhook_url, file_path, message, capture_id, int(owns_file), now, now))
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def retry_dead(self):
+        """Queue dead items whose file still exists again with a fresh set of attempts, returns how many"""
+        with self._lock, self._db:
+            rows = self._db.execute("SELECT id, file_path FROM outbox WHERE status = 'dead'").fetchall()
+            ids = [(row_id,) for row_id, file_path in rows if os.path.exists(file_path)]
+            self._db.executemany(
+                "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE id = ?",
+                [(time.time(), row_id) for (row_id,) in ids])
+        self._wakeup.set()
+        return len(ids)
+
+    def counts(self):
+        """Number of items per status"""
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+    def purge_sent(self, older_than_days=DEFAULT_KEEP_SENT_DAYS):
+        """Drop sent items from the queue table"""
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?", (cutoff,))
+
+    def backoff(self, attempts):
+        """Delay before the next attempt, with jitter so retries do not stampede"""
+        delay = min(self.base_delay * (2 ** max(attempts - 1, 0)), self.max_delay)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _claim(self, now, limit):
+        """Mark a batch of due items in flight and return them"""
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT id, key, webhook_url, file_path, message, capture_id, owns_file, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, limit)).fetchall()
+            if rows:
+                self._db.executemany("UPDATE outbox SET status = 'inflight' WHERE id = ?", [(r[0],) for r in rows])
+        return [OutboxItem(*row) for row in rows]
+
+    def _next_due(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def _send(self, item):
+        if time.time() < self._paused_until:
+            return None  # Queue is rate limited: keep the item without using up an attempt
+        try:
+            result = self.send(item)
+        except Exception as e:
+            result = DeliveryResult(False, error=str(e))
+        if result.ok:
+            self._outage = 0
+        if result.retry_after:
+            # Discord rate limits are per webhook: hold the whole queue
+            self._paused_until = max(self._paused_until, time.time() + result.retry_after)
+        elif is_transient(result):
+            self._trip()
+        return result
+
+    def _trip(self):
+        """Pause the whole queue after a network error or 5xx (circuit breaker)"""
+        now = time.time()
+        with self._outage_lock:
+            if now < self._paused_until:
+                return  # Another send of the same batch already paused it
+            self._outage += 1
+            self._paused_until = now + self.backoff(self._outage)
+
+    def _commit(self, items, results):
+        """Store the outcome of a whole batch in one transaction"""
+        now = time.time()
+        updates = []
+        deferred = []
+        finished = []
+        for item, result in zip(items, results):
+            if result is None:
+                deferred.append((self._paused_until, item.id))
+                continue
+            attempts = item.attempts + 1
+            if result.ok:
+                updates.append(('sent', attempts, now, now, None, item.id))
+                finished.append((item, 'sent', result))
+            elif result.permanent or (attempts >= self.max_attempts and not is_transient(result)):
+                updates.append(('dead', attempts, now, None, result.error, item.id))
+                finished.append((item, 'dead', result))
+            elif result.retry_after is not None:
+                updates.append(('pending', attempts, now + result.retry_after, None, result.error, item.id))
+            elif is_transient(result):
+                # Outage: due again when the queue's pause ends
+                updates.append(('pending', attempts, max(self._paused_until, now), None, result.error, item.id))
+            else:
+                updates.append(('pending', attempts, now + self.backoff(attempts), None, result.error, item.id))
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, sent_at = ?, last_error = ? "
+                "WHERE id = ?", updates)
+            # Not attempted because the queue was paused: keep attempts and last error
+            self._db.executemany(
+                "UPDATE outbox SET status = 'pending', next_attempt_at = ? WHERE id = ?", deferred)
+
+        for item, status, result in finished:
+            if status == 'sent' and item.owns_file:
+                try:
+                    os.remove(item.file_path)
+                except OSError:
+                    pass
+            if self.on_result:
+                try:
+                    self.on_result(item, status, result)
+                except Exception as e:
+                    print(f"Outbox callback error: {e}")
+
+    def _flush_loop(self):
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='outbox-send')
+        next_purge = 0.0
+        try:
+            while not self._stopped.is_set():
+                now = time.time()
+                if now >= next_purge:
+                    self.purge_sent(self.keep_sent_days)
+                    next_purge = now + PURGE_INTERVAL
+
+                if now < self._paused_until:
+                    self._wakeup.wait(self._paused_until - now)
+                    self._wakeup.clear()
+                    continue
+
+                # During an outage a single item probes whether deliveries work again
+                items = self._claim(now, 1 if self._outage else self.batch_size)
+                if not items:
+                    next_due = self._next_due()
+                    timeout = next_purge - now
+                    if next_due is not None:
+                        timeout = min(max(next_due - now, 0.05), timeout)
+                    self._wakeup.wait(timeout)
+                    self._wakeup.clear()
+                    continue
+
+                results = list(pool.map(self._send, items))
+                self._commit(items, results)
+        finally:
+            pool.shutdown(wait=True)
@@ -0,0 +1,129 @@
+# recognition.py - Orange text extraction and OCR for the streak number
+import os
+import re
+import sys
+import numpy as np
+from contextlib import nullcontext
+import pytesseract
+from PIL import Image, ImageOps
+
+# Set tesseract path for Windows
+if sys.platform == 'win32':
+    tesseract_paths = [
+        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+        os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Programs', 'Tesseract-OCR', 'tesseract.exe')
+    ]
+    for path in tesseract_paths:
+        if os.path.exists(path):
+            pytesseract.pytesseract.tesseract_cmd = path
+            break
+
+
+OCR_SCALE = 5  # Upscale factor of the binary mask before OCR
+OCR_CONFIGS = [
+    r'--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789',
+    r'--oem 3 --psm 8 -c tessedit_char_whitelist=0123456789',
+]
+
+
+def no_stage(name):
+    return nullcontext()
+
+
+def ocr_digits(image):
+    """Longest run of digits Tesseract reads in a black-on-white image, or None"""
+    for config in OCR_CONFIGS:
+        try:
+            text = pytesseract.image_to_string(image, config=config).strip()
+            if text:
+                numbers = re.findall(r'\d+', text)
+                if numbers:
+                    return max(numbers, key=len)
+        except:
+            continue
+    return None
+
+
+class TextReader:
+    """Reads the streak number from zone captures.
+
+    In bounded mode the mask, the binary image and its upscale are written
+    into arrays kept from the previous frame (reallocated only when the zone
+    size changes), so a 24/7 run reuses the same few buffers instead of
+    allocating a new set every frame. The upscale is then nearest-neighbour
+    instead of LANCZOS; for a binary mask at an integer scale that only
+    loses edge smoothing. Buffers are not shared between threads, so use one
+    reader per thread.
+    """
+
+    __slots__ = ('classifier', 'bounded', 'ocr', '_shape', '_index', '_channel', '_mask', '_binary', '_scaled')
+
+    def __init__(self, classifier, bounded=False, ocr=ocr_digits):
+        self.classifier = classifier
+        self.bounded = bounded
+        self.ocr = ocr
+        self._shape = None
+
+    def _buffers(self, shape):
+        if shape != self._shape:
+            height, width = shape
+            self._index = np.empty(shape, dtype=np.intp)
+            self._channel = np.empty(shape, dtype=np.intp)
+            self._mask = np.empty(shape, dtype=bool)
+            self._binary = np.empty(shape, dtype=np.uint8)
+            self._scaled = np.empty((height * OCR_SCALE, width * OCR_SCALE), dtype=np.uint8)
+            self._shape = shape
+
+    def read(self, image, stage=no_stage):
+        """Extract text that has orange colored text from the image.
+
+        `stage(name)` is entered around each pipeline step, for profiling.
+        """
+        try:
+            img_array = np.asarray(image)
+
+            if img_array.ndim != 3 or img_array.shape[0] < 5 or img_array.shape[1] < 5:
+                return None
+
+            if self.bounded:
+                with stage('mask'):
+                    self._buffers(img_array.shape[:2])
+                    orange_mask = self.classifier.mask(img_array, out=self._mask, index=self._index,
+                                                       channel=self._channel)
+                with stage('upscale'):
+                    # Black text on white, scaled up for OCR
+                    np.logical_not(orange_mask, out=orange_mask)
+                    np.multiply(orange_mask, 255, out=self._binary, casting='unsafe')
+                    height, width = self._shape
+                    self._scaled.reshape(height, OCR_SCALE, width, OCR_SCALE)[...] = self._binary[:, None, :, None]
+                    filtered_image = Image.frombuffer('L', (width * OCR_SCALE, height * OCR_SCALE),
+                                                      self._scaled, 'raw', 'L', 0, 1)
+            else:
+                with stage('mask'):
+                    # Single LUT lookup per pixel (target colors + tolerance, see color_classifier.py)
+                    orange_mask = self.classifier.mask(img_array)
+
+                with stage('upscale'):
+                    # Create binary image
+                    result = np.zeros((img_array.shape[0], img_array.shape[1]), dtype=np.uint8)
+                    result[orange_mask] = 255
+
+                    # Scale up for OCR
+                    filtered_image = Image.fromarray(result)
+                    width, height = filtered_image.size
+                    filtered_image = filtered_image.resize((width * OCR_SCALE, height * OCR_SCALE),
+                                                           Image.Resampling.LANCZOS)
+
+                    # Invert for OCR
+                    filtered_image = ImageOps.invert(filtered_image)
+
+            with stage('ocr'):
+                return self.ocr(filtered_image)
+        except:
+            return None
+
+
+def extract_orange_text(image, classifier):
+    """Extract text that has orange colored text from the image"""
+    return TextReader(classifier).read(image)
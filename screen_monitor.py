@@ -1,41 +1,33 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageGrab, ImageTk
-import pytesseract
-import requests
+from PIL import ImageGrab
 import keyboard
 import threading
 import time
-import io
+import gc
 import os
-import re
-import sys
-import json
+import uuid
 import webbrowser
-import numpy as np
 from datetime import datetime
+from delivery import WebhookSender
+from outbox import Outbox
+from tracker import StreakTracker, POLL_INTERVAL
+from async_runtime import AsyncMonitorRuntime
+from zone_tracker import ZoneAnchor
+from archive import ScreenshotArchive
+from settings import SettingsStore, parse_changes, parse_delay, parse_command, get_config_path, get_cache_dir
+from command_bus import CommandBus
+from color_classifier import ColorClassifier
+from recognition import TextReader
 
-# Config file path
-def get_config_path():
-    if getattr(sys, 'frozen', False):
-        # Running as exe
-        return os.path.join(os.path.dirname(sys.executable), 'config.json')
-    else:
-        # Running as script
-        return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+def get_outbox_dir():
+    """Directory for the pending delivery queue"""
+    return os.path.join(os.path.dirname(get_config_path()), 'outbox')
 
-# Set tesseract path for Windows
-if sys.platform == 'win32':
-    tesseract_paths = [
-        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-        os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Programs', 'Tesseract-OCR', 'tesseract.exe')
-    ]
-    for path in tesseract_paths:
-        if os.path.exists(path):
-            pytesseract.pytesseract.tesseract_cmd = path
-            break
+def get_archive_dir():
+    """Directory for archived screenshots and their index"""
+    return os.path.join(os.path.dirname(get_config_path()), 'archive')
 
 class ZoneSelector(tk.Toplevel):
     """Transparent overlay window for selecting screen zone"""
@@ -100,20 +92,35 @@ class ScreenMonitorApp(ctk.CTk):
         
         # App state
         self.is_running = False
-        self.selected_zone = None
         self.monitor_thread = None
-        self.last_detected_value = None
-        self.change_count = 0
+        self.tracker = StreakTracker()
+        self.async_runtime = None
+        self.selecting_zone = False
         
-        # Target color (orange like in the screenshot - RGB approximately)
-        self.target_color = (255, 140, 0)  # Orange color
-        self.color_tolerance = 80
+        # Everything that touches widgets runs on the Tk thread through the bus
+        self.commands = CommandBus(self)
+        self.register_commands()
         
-        # Default settings
-        self.delay_seconds = 3.0
+        # Color LUT for text detection, built from the color settings
+        self.color_classifier = None
+        self.text_readers = {}  # Engine name -> (TextReader, lock), so each engine keeps its own buffers
         
         # Load saved config
         self.load_config()
+        settings = self.settings
+        
+        # Local screenshot archive
+        try:
+            self.archive = ScreenshotArchive(get_archive_dir(), max_bytes=settings.archive_max_mb * 1024 * 1024,
+                                             max_age_days=settings.archive_max_days)
+        except Exception as e:
+            print(f"Error opening archive: {e}")
+            self.archive = None
+        
+        # Durable delivery queue - resumes unsent screenshots from previous runs
+        self.webhook_sender = WebhookSender()
+        self.outbox = Outbox(os.path.join(get_outbox_dir(), 'outbox.db'), self.webhook_sender,
+                             on_result=self.on_delivery_result)
         
         # Window setup
         self.title("Screen Monitor")
@@ -137,12 +144,23 @@ class ScreenMonitorApp(ctk.CTk):
         # Load saved values into UI
         self.apply_loaded_config()
         
-        # Bind hotkeys
+        # Bind hotkeys and start handling commands
         self.setup_hotkeys()
+        self.commands.start()
         
         # Protocol for closing
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+        # Start draining the outbox once the UI exists for status callbacks
+        self.outbox.start()
+        
+        # Pick up external edits of config.json while running
+        self.settings_store.listeners.append(self.on_settings_changed)
+        self.settings_store.start_watching()
+        
+        if settings.memory_mode == 'bounded':
+            self.apply_memory_mode(settings)
+        
     def create_widgets(self):
         # Main container
         self.main_frame = ctk.CTkFrame(self, corner_radius=0)
@@ -253,7 +271,7 @@ class ScreenMonitorApp(ctk.CTk):
         self.select_zone_btn = ctk.CTkButton(
             self.zone_section,
             text="Select Zone",
-            command=self.select_zone,
+            command=lambda: self.commands.post('select_zone'),
             height=40,
             font=ctk.CTkFont(size=14),
             fg_color="#6366f1",
@@ -296,6 +314,8 @@ class ScreenMonitorApp(ctk.CTk):
         )
         self.changes_entry.pack(fill='x', padx=15, pady=(5, 10))
         self.changes_entry.insert(0, "5")
+        self.changes_entry.bind('<KeyRelease>', self.on_changes_edited)
+        self.changes_entry.bind('<FocusOut>', self.on_changes_edited)
         
         # Webhook Section
         self.webhook_section = ctk.CTkFrame(self.content_frame, corner_radius=10)
@@ -315,6 +335,8 @@ class ScreenMonitorApp(ctk.CTk):
             placeholder_text="https://discord.com/api/webhooks/..."
         )
         self.webhook_entry.pack(fill='x', padx=15, pady=(5, 5))
+        self.webhook_entry.bind('<KeyRelease>', self.on_webhook_edited)
+        self.webhook_entry.bind('<FocusOut>', self.on_webhook_edited)
         
         # Paste button for webhook
         self.paste_btn = ctk.CTkButton(
@@ -347,6 +369,8 @@ class ScreenMonitorApp(ctk.CTk):
         )
         self.delay_entry.pack(fill='x', padx=15, pady=(5, 10))
         self.delay_entry.insert(0, "3")
+        self.delay_entry.bind('<KeyRelease>', self.on_delay_edited)
+        self.delay_entry.bind('<FocusOut>', self.on_delay_edited)
         
         # Control Buttons Section
         self.controls_section = ctk.CTkFrame(self.content_frame, corner_radius=10)
@@ -365,7 +389,7 @@ class ScreenMonitorApp(ctk.CTk):
         self.start_btn = ctk.CTkButton(
             self.buttons_frame,
             text="▶ Start (F1)",
-            command=self.start_monitoring,
+            command=lambda: self.commands.post('start'),
             height=45,
             font=ctk.CTkFont(size=14, weight="bold"),
             fg_color="#22c55e",
@@ -376,7 +400,7 @@ class ScreenMonitorApp(ctk.CTk):
         self.stop_btn = ctk.CTkButton(
             self.buttons_frame,
             text="⏹ Stop (F3)",
-            command=self.stop_monitoring,
+            command=lambda: self.commands.post('stop'),
             height=45,
             font=ctk.CTkFont(size=14, weight="bold"),
             fg_color="#ef4444",
@@ -385,6 +409,17 @@ class ScreenMonitorApp(ctk.CTk):
         )
         self.stop_btn.pack(side='right', expand=True, fill='x', padx=(5, 0))
         
+        self.retry_btn = ctk.CTkButton(
+            self.controls_section,
+            text="🔁 Retry Failed Screenshots",
+            command=lambda: self.commands.post('retry_failed'),
+            height=30,
+            font=ctk.CTkFont(size=12),
+            fg_color="#4a5568",
+            hover_color="#2d3748"
+        )
+        self.retry_btn.pack(fill='x', padx=15, pady=(0, 10))
+        
         # Status Section
         self.status_section = ctk.CTkFrame(self.content_frame, corner_radius=10)
         self.status_section.pack(fill='x', padx=15, pady=(10, 15))
@@ -540,47 +575,35 @@ class ScreenMonitorApp(ctk.CTk):
             clipboard_text = self.clipboard_get()
             self.webhook_entry.delete(0, 'end')
             self.webhook_entry.insert(0, clipboard_text)
+            self.on_webhook_edited()
         except:
             pass
     
     def load_config(self):
         """Load configuration from JSON file"""
-        try:
-            config_path = get_config_path()
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    self.saved_webhook = config.get('webhook', '')
-                    self.saved_changes = config.get('changes', '5')
-                    self.saved_delay = config.get('delay', '3')
-                    self.saved_zone = config.get('zone', None)
-                    self.delay_seconds = float(config.get('delay', 3))
-                    if self.saved_zone:
-                        self.selected_zone = tuple(self.saved_zone)
-            else:
-                self.saved_webhook = ''
-                self.saved_changes = '5'
-                self.saved_delay = '3'
-                self.saved_zone = None
-        except Exception as e:
-            print(f"Error loading config: {e}")
-            self.saved_webhook = ''
-            self.saved_changes = '5'
-            self.saved_delay = '3'
-            self.saved_zone = None
+        self.settings_store = SettingsStore(get_config_path())
+        
+    @property
+    def settings(self):
+        """Current settings (immutable, safe to read from any thread)"""
+        return self.settings_store.settings
+        
+    @property
+    def selected_zone(self):
+        return self.settings.zone
     
     def apply_loaded_config(self):
         """Apply loaded config to UI elements"""
         try:
-            if hasattr(self, 'saved_webhook') and self.saved_webhook:
-                self.webhook_entry.delete(0, 'end')
-                self.webhook_entry.insert(0, self.saved_webhook)
-            if hasattr(self, 'saved_changes') and self.saved_changes:
-                self.changes_entry.delete(0, 'end')
-                self.changes_entry.insert(0, self.saved_changes)
-            if hasattr(self, 'saved_delay') and self.saved_delay:
-                self.delay_entry.delete(0, 'end')
-                self.delay_entry.insert(0, self.saved_delay)
+            settings = self.settings
+            for entry, value in (
+                (self.webhook_entry, settings.webhook),
+                (self.changes_entry, settings.to_dict()['changes']),
+                (self.delay_entry, settings.to_dict()['delay']),
+            ):
+                if entry.get().strip() != value:
+                    entry.delete(0, 'end')
+                    entry.insert(0, value)
             if self.selected_zone:
                 self.zone_status_label.configure(
                     text=f"Zone: ({self.selected_zone[0]}, {self.selected_zone[1]}) to ({self.selected_zone[2]}, {self.selected_zone[3]})",
@@ -591,221 +614,368 @@ class ScreenMonitorApp(ctk.CTk):
     
     def save_config(self):
         """Save configuration to JSON file"""
+        self.settings_store.flush()
+        
+    def on_webhook_edited(self, event=None):
+        self.settings_store.update(webhook=self.webhook_entry.get().strip())
+        
+    def on_changes_edited(self, event=None):
         try:
-            config = {
-                'webhook': self.webhook_entry.get().strip(),
-                'changes': self.changes_entry.get().strip(),
-                'delay': self.delay_entry.get().strip(),
-                'zone': list(self.selected_zone) if self.selected_zone else None
-            }
-            config_path = get_config_path()
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2)
-        except Exception as e:
-            print(f"Error saving config: {e}")
+            self.settings_store.update(changes_threshold=parse_changes(self.changes_entry.get()))
+        except ValueError:
+            pass  # Keep the last valid value until the entry is fixed
+        
+    def on_delay_edited(self, event=None):
+        try:
+            self.settings_store.update(delay=parse_delay(self.delay_entry.get()))
+        except ValueError:
+            pass
+            
+    def on_settings_changed(self, old, new, source):
+        """Apply changed settings to the running app (called from any thread)"""
+        if source == 'file':
+            self.commands.post('reload_settings')
+        if new.hotkeys != old.hotkeys:
+            self.commands.post('bind_hotkeys')
+        if self.archive is not None:
+            self.archive.max_bytes = new.archive_max_mb * 1024 * 1024
+            self.archive.max_age_days = new.archive_max_days
+        if new.memory_mode != old.memory_mode:
+            self.apply_memory_mode(new)  # Readers switch buffers on their next frame
+        if self.async_runtime is not None:
+            if new.zone != old.zone and new.zone:
+                self.async_runtime.update_zone('main', new.zone)
+            for name, zone in new.zones:
+                if zone != old.get_zone(name):
+                    self.async_runtime.update_zone(name, zone)
+        # Color settings are checked by get_color_classifier on the next frame
+    
+    def apply_memory_mode(self, settings):
+        """Keep long-lived objects out of GC passes in bounded mode"""
+        if settings.memory_mode == 'bounded':
+            gc.collect()
+            gc.freeze()
+        else:
+            gc.unfreeze()
     
     def get_delay(self):
-        """Get delay value from entry"""
-        try:
-            return float(self.delay_entry.get().strip())
-        except:
-            return 3.0
+        """Get delay value from settings"""
+        return self.settings.delay
+            
+    def register_commands(self):
+        """Command handlers, all run on the Tk thread"""
+        for name, handler in (
+            ('start', self.start_monitoring),
+            ('stop', self.stop_monitoring),
+            ('toggle', self.toggle_monitoring),
+            ('select_zone', self.select_zone),
+            ('retry_failed', self.retry_failed),
+            ('hotkey', self.run_hotkey),
+            ('bind_hotkeys', self.setup_hotkeys),
+            ('reload_settings', self.apply_loaded_config),
+            ('status', self.show_status),
+            ('detection', self.show_detection),
+            ('change_count', self.show_change_count),
+        ):
+            self.commands.register(name, handler)
             
     def setup_hotkeys(self):
-        keyboard.add_hotkey('F1', self.start_monitoring)
-        keyboard.add_hotkey('F3', self.stop_monitoring)
-        
+        """(Re)bind the hotkeys from settings; the hook thread only posts commands"""
+        try:
+            keyboard.unhook_all_hotkeys()
+        except Exception:
+            pass  # Nothing bound yet
+        labels = {}
+        for key, command in self.settings.hotkeys:
+            try:
+                keyboard.add_hotkey(key, self.commands.post, args=('hotkey', command))
+                labels.setdefault(command, key)
+            except Exception as e:
+                print(f"Invalid hotkey '{key}': {e}")
+        self.start_btn.configure(text="▶ Start" + (f" ({labels['start']})" if 'start' in labels else ""))
+        self.stop_btn.configure(text="⏹ Stop" + (f" ({labels['stop']})" if 'stop' in labels else ""))
+        
+    def run_hotkey(self, command):
+        """Run a hotkey command such as 'start' or 'toggle boss'"""
+        action, zone_name = parse_command(command)
+        if zone_name is None or zone_name == 'main':
+            self.commands.dispatch(action)
+        elif action in ('start', 'stop', 'toggle'):
+            self.control_engine(action, zone_name)
+        else:
+            self.update_status(f"'{action}' does not take a zone")
+            
+    def control_engine(self, action, name):
+        """Start/stop the engine of an extra zone from settings (always on the asyncio runtime)"""
+        runtime = self.get_async_runtime()
+        running = runtime.is_running(name)
+        if action == 'toggle':
+            action = 'stop' if running else 'start'
+        if action == 'stop':
+            if running:
+                runtime.stop_engine(name)
+                self.text_readers.pop(name, None)
+                self.update_status(f"[{name}] Monitoring stopped.")
+            return
+        zone = self.settings.get_zone(name)
+        if zone is None:
+            self.update_status(f"Unknown zone '{name}' - add it to \"zones\" in config.json")
+        elif not running:
+            runtime.start_engine(name, zone)
+            self.update_status(f"[{name}] Monitoring started...")
+            
     def select_zone(self):
+        if self.selecting_zone:
+            return
+        self.selecting_zone = True
         self.withdraw()  # Hide main window
-        time.sleep(0.3)  # Small delay
+        # Let the window disappear before the overlay opens, without blocking the UI thread
+        self.after(300, self.open_zone_selector)
         
+    def open_zone_selector(self):
         def on_zone_selected(zone):
-            self.selected_zone = zone
-            self.deiconify()  # Show main window
+            self.settings_store.update(zone=zone)
             self.zone_status_label.configure(
                 text=f"Zone: ({zone[0]}, {zone[1]}) to ({zone[2]}, {zone[3]})",
                 text_color="#22c55e"
             )
             self.update_status("Zone selected. Ready to start.")
             
+        def on_destroy(event):
+            if event.widget is selector:
+                self.selecting_zone = False
+                self.deiconify()  # Show main window
+                
         selector = ZoneSelector(on_zone_selected)
-        selector.wait_window()
-        self.deiconify()
+        selector.bind('<Destroy>', on_destroy, add='+')
         
     def get_changes_threshold(self):
-        value = self.changes_entry.get().strip()
-        if value == "-":
-            return None  # Disabled
-        try:
-            return int(value)
-        except ValueError:
-            return None
-            
-    def extract_orange_text(self, image):
-        """Extract text that has orange colored text from the image"""
-        try:
-            img_array = np.array(image)
-            from PIL import ImageOps
-            
-            if img_array.shape[0] < 5 or img_array.shape[1] < 5:
-                return None
-            
-            r, g, b = img_array[:,:,0].astype(float), img_array[:,:,1].astype(float), img_array[:,:,2].astype(float)
+        """Get changes threshold from settings (None = disabled)"""
+        return self.settings.changes_threshold
             
-            # Target color: #FD8C5E = RGB(253, 140, 94)
-            # With tolerance of ~40 for each channel
-            orange_mask = (
-                (r >= 210) & (r <= 255) &    # Red: 253 ± 43
-                (g >= 100) & (g <= 180) &    # Green: 140 ± 40
-                (b >= 50) & (b <= 140)       # Blue: 94 ± 46
-            )
-            
-            # Create binary image
-            result = np.zeros((img_array.shape[0], img_array.shape[1]), dtype=np.uint8)
-            result[orange_mask] = 255
-            
-            # Convert to PIL Image
-            filtered_image = Image.fromarray(result)
-            
-            # Scale up for OCR
-            width, height = filtered_image.size
-            scale = 5
-            filtered_image = filtered_image.resize((width * scale, height * scale), Image.Resampling.LANCZOS)
-            
-            # Invert for OCR
-            filtered_image = ImageOps.invert(filtered_image)
-            
-            # OCR
-            configs = [
-                r'--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789',
-                r'--oem 3 --psm 8 -c tessedit_char_whitelist=0123456789',
-            ]
-            
-            for config in configs:
-                try:
-                    text = pytesseract.image_to_string(filtered_image, config=config).strip()
-                    if text:
-                        numbers = re.findall(r'\d+', text)
-                        if numbers:
-                            return max(numbers, key=len)
-                except:
-                    continue
+    def get_color_classifier(self):
+        """Get color classifier, rebuilding the LUT only when color settings change"""
+        classifier = self.color_classifier
+        s = self.settings
+        if classifier is None or not classifier.matches(
+                s.target_colors, s.color_tolerance, s.color_metric, s.lut_bits):
+            try:
+                classifier = ColorClassifier(s.target_colors, s.color_tolerance,
+                                             s.color_metric, s.lut_bits, cache_dir=get_cache_dir())
+            except ValueError as e:
+                print(f"Invalid color settings, using defaults: {e}")
+                classifier = ColorClassifier(cache_dir=get_cache_dir())
+            self.color_classifier = classifier
+        return classifier
             
-            return None
-        except:
-            return None
-        
-    def capture_zone(self):
-        """Capture the selected zone"""
-        if self.selected_zone:
-            return ImageGrab.grab(bbox=self.selected_zone)
+    def get_text_reader(self, engine='main'):
+        """(reader, lock) of an engine, recreated when color or memory settings change.
+
+        Keyed by engine rather than thread: asyncio engines share executor
+        threads, and zones of different sizes would otherwise reallocate the
+        buffers on almost every frame.
+        """
+        classifier = self.get_color_classifier()
+        bounded = self.settings.memory_mode == 'bounded'
+        entry = self.text_readers.get(engine)
+        if entry is None or entry[0].classifier is not classifier or entry[0].bounded != bounded:
+            entry = (TextReader(classifier, bounded=bounded), threading.Lock())
+            self.text_readers[engine] = entry
+        return entry
+        
+    def extract_orange_text(self, image, engine='main'):
+        """Extract text that has orange colored text from the image"""
+        reader, lock = self.get_text_reader(engine)
+        with lock:  # Only contended if a stopping engine is still finishing a frame
+            return reader.read(image)
+        
+    def capture_zone(self, zone=None):
+        """Capture the given zone (defaults to the selected zone)"""
+        zone = zone or self.selected_zone
+        if zone:
+            return ImageGrab.grab(bbox=zone)
         return None
         
     def capture_fullscreen(self):
         """Capture full screen"""
         return ImageGrab.grab()
         
+    def capture_region(self, bbox):
+        """Capture an area of the screen (None = full screen)"""
+        return ImageGrab.grab(bbox=bbox)
+        
+    def create_zone_anchor(self, zone, engine='main'):
+        """Tracker that moves the effective zone along with the streak label"""
+        return ZoneAnchor(zone, self.capture_region, lambda image: self.extract_orange_text(image, engine))
+        
+    def follow_zone(self, anchor, detected):
+        """Re-anchor the zone after empty reads (may grab a larger area of the screen)"""
+        if detected:
+            anchor.found()
+        elif anchor.missed(self.get_color_classifier()):
+            x1, y1, x2, y2 = anchor.zone
+            self.post_status(f"Streak moved, zone re-anchored to ({x1}, {y1})")
+        
+    def build_message(self, detected_value, timestamp):
+        """Discord message text for a screenshot"""
+        timestamp = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        return f"📸 **Screen Capture**\n🔢 Detected Value: **{detected_value}**\n⏰ Time: {timestamp}"
+        
     def send_to_discord(self, screenshot, detected_value):
-        """Send screenshot to Discord webhook"""
-        webhook_url = self.webhook_entry.get().strip()
+        """Queue screenshot for delivery to Discord webhook through the outbox"""
+        webhook_url = self.settings.webhook
         
         if not webhook_url:
-            self.update_status("Error: No webhook URL provided")
+            screenshot.close()
+            self.post_status("Error: No webhook URL provided")
             return False
             
-        try:
-            # Convert image to bytes
-            img_byte_arr = io.BytesIO()
-            screenshot.save(img_byte_arr, format='PNG')
-            img_byte_arr.seek(0)
+        message = self.build_message(detected_value, time.time())
+        
+        if self.archive is not None:
+            # Encoding and writing happen on the archive writer thread, then the
+            # archived file is queued - the monitor thread never waits on disk
+            def on_archived(future):
+                try:
+                    record = future.result()
+                    if not self.outbox.enqueue(self.capture_key(record), webhook_url, record.path, message,
+                                               capture_id=record.id):
+                        self.post_status("Error queueing screenshot: already in the delivery queue")
+                except Exception as e:
+                    self.post_status(f"Error queueing screenshot: {str(e)}")
+                    
+            self.archive.submit(screenshot, detected_value).add_done_callback(on_archived)
+            return True
             
-            # Prepare the message
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            message = f"📸 **Screen Capture**\n🔢 Detected Value: **{detected_value}**\n⏰ Time: {timestamp}"
+        try:
+            key = uuid.uuid4().hex
+            path = os.path.join(get_outbox_dir(), 'files', f"{key}.png")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            screenshot.save(path, format='PNG')
+            self.outbox.enqueue(key, webhook_url, path, message, owns_file=True)
+            return True
+        except Exception as e:
+            self.post_status(f"Error queueing screenshot: {str(e)}")
+            return False
+        finally:
+            screenshot.close()
             
-            # Send to Discord
-            files = {'file': ('screenshot.png', img_byte_arr, 'image/png')}
-            data = {'content': message}
+    def capture_key(self, record):
+        """Outbox key of an archived screenshot.
+
+        Not the archive row id: ids start over if archive/ is deleted while
+        outbox.db still holds the keys of earlier sends.
+        """
+        return f"capture-{record.file_hash}-{record.created_at:.6f}"
+        
+    def on_delivery_result(self, item, status, result):
+        """Called from the outbox flusher when a delivery is sent or given up on"""
+        if self.archive is not None and item.capture_id is not None:
+            self.archive.mark(item.capture_id, 'sent' if status == 'sent' else 'failed', result.error)
+        if status == 'sent':
+            self.post_status("Screenshot sent!")
+        else:
+            self.post_status(f"Delivery failed: {result.error}")
+        
+    def retry_failed(self):
+        """Re-send failed screenshots from disk instead of capturing again"""
+        webhook_url = self.settings.webhook
+        requeued = 0
+        if self.archive is not None and webhook_url:
+            # Failed captures that never made it into the outbox
+            for record in reversed(self.archive.records(status='failed')):
+                if not os.path.exists(record.path):
+                    continue  # Removed by archive retention
+                message = self.build_message(record.detected_value, record.created_at)
+                if self.outbox.enqueue(self.capture_key(record), webhook_url, record.path, message,
+                                       capture_id=record.id):
+                    requeued += 1
+        requeued += self.outbox.retry_dead()
+        self.update_status(f"Retrying {requeued} screenshots...")
             
-            response = requests.post(webhook_url, data=data, files=files)
+    def post_detection(self, detected, engine='main'):
+        """Show the latest reading in the UI (safe from any thread)"""
+        self.commands.post_latest(('detection', engine), 'detection', detected, engine)
+        
+    def post_status(self, text, engine='main'):
+        """Update status text (safe from any thread)"""
+        self.commands.post_latest('status', 'status', text, engine)
+        
+    def post_change_count(self, count, engine='main'):
+        """Update changes counter (safe from any thread)"""
+        self.commands.post_latest(('change_count', engine), 'change_count', count, engine)
+        
+    def post_tracker_event(self, event, tracker, engine='main'):
+        """Show a StreakTracker event in the UI (safe from any thread)"""
+        if event[0] == 'initial':
+            self.post_status(f"Initial value: {event[1]}", engine)
+        else:
+            self.post_change_count(tracker.change_count, engine)
+            self.post_status(f"Change detected: {event[1]} → {event[2]}", engine)
             
-            if response.status_code in [200, 204]:
-                self.update_status(f"Screenshot sent! Value: {detected_value}")
-                return True
-            else:
-                self.update_status(f"Webhook error: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            self.update_status(f"Error sending: {str(e)}")
-            return False
+    def show_detection(self, detected, engine='main'):
+        label = "Detected value" if engine == 'main' else f"Detected value ({engine})"
+        self.detected_value_label.configure(text=f"{label}: {detected}")
+        
+    def show_status(self, text, engine='main'):
+        self.update_status(text if engine == 'main' else f"[{engine}] {text}")
+        
+    def show_change_count(self, count, engine='main'):
+        label = "Changes" if engine == 'main' else f"Changes ({engine})"
+        self.changes_count_label.configure(text=f"{label}: {count}")
             
     def monitor_loop(self):
         """Main monitoring loop"""
-        self.last_detected_value = None
-        self.change_count = 0
-        self.stable_value = None
-        self.stable_count = 0
-        STABILITY_THRESHOLD = 2  # Value must be the same 2 times to be considered stable
+        tracker = self.tracker
+        tracker.reset()
+        anchor = self.create_zone_anchor(self.selected_zone)
+        
+        # Build (or load cached) color LUT before the first frame
+        self.get_color_classifier()
         
         while self.is_running:
             try:
+                # Follow a newly selected zone
+                if anchor.base != self.selected_zone:
+                    anchor.reset(self.selected_zone)
+                    
                 # Capture zone
-                zone_image = self.capture_zone()
+                zone_image = self.capture_zone(anchor.zone)
                 if zone_image is None:
                     time.sleep(0.5)
                     continue
                     
                 # Extract text
-                detected = self.extract_orange_text(zone_image)
+                try:
+                    detected = self.extract_orange_text(zone_image)
+                finally:
+                    zone_image.close()
+                
+                # Search around for the label if it left the zone
+                self.follow_zone(anchor, detected)
                 
                 if detected:
                     # Update UI with current detection
-                    self.after(0, lambda v=detected: self.detected_value_label.configure(
-                        text=f"Detected value: {v}"
-                    ))
+                    self.post_detection(detected)
                     
-                    # Stability check - only count as real value if detected multiple times
-                    if detected == self.stable_value:
-                        self.stable_count += 1
-                    else:
-                        self.stable_value = detected
-                        self.stable_count = 1
+                    event = tracker.update(detected)
+                    if event:
+                        self.post_tracker_event(event, tracker)
+                        
+                    # Check threshold
+                    if event and event[0] == 'change' and tracker.take_trigger(self.get_changes_threshold()):
+                        # Wait for delay before taking screenshot
+                        delay = self.get_delay()
+                        self.post_status(f"Waiting {delay}s before screenshot...")
+                        time.sleep(delay)
+                        
+                        # Take full screenshot and send
+                        self.post_status("Taking screenshot...")
+                        fullscreen = self.capture_fullscreen()
+                        self.send_to_discord(fullscreen, tracker.last_value)
+                        self.post_change_count(0)
                     
-                    # Only process if value is stable (detected multiple times in a row)
-                    if self.stable_count >= STABILITY_THRESHOLD:
-                        # If this is the first stable value, just record it
-                        if self.last_detected_value is None:
-                            self.last_detected_value = self.stable_value
-                            self.after(0, lambda v=self.stable_value: self.update_status(f"Initial value: {v}"))
-                        # Check for actual change from last confirmed value
-                        elif self.stable_value != self.last_detected_value:
-                            self.change_count += 1
-                            self.after(0, lambda c=self.change_count: self.changes_count_label.configure(
-                                text=f"Changes: {c}"
-                            ))
-                            self.after(0, lambda old=self.last_detected_value, new=self.stable_value: 
-                                self.update_status(f"Change detected: {old} → {new}"))
-                            
-                            # Update last confirmed value BEFORE checking threshold
-                            self.last_detected_value = self.stable_value
-                            
-                            # Check threshold
-                            threshold = self.get_changes_threshold()
-                            if threshold is not None and self.change_count >= threshold:
-                                # Wait for delay before taking screenshot
-                                delay = self.get_delay()
-                                self.after(0, lambda d=delay: self.update_status(f"Waiting {d}s before screenshot..."))
-                                time.sleep(delay)
-                                
-                                # Take full screenshot and send
-                                self.after(0, lambda: self.update_status("Taking screenshot..."))
-                                fullscreen = self.capture_fullscreen()
-                                self.send_to_discord(fullscreen, self.stable_value)
-                                self.change_count = 0
-                                self.after(0, lambda: self.changes_count_label.configure(text="Changes: 0"))
-                    
-                time.sleep(0.3)  # Poll interval
+                time.sleep(POLL_INTERVAL)
                 
             except Exception as e:
                 print(f"Monitor error: {e}")
@@ -819,28 +989,52 @@ class ScreenMonitorApp(ctk.CTk):
             messagebox.showwarning("Warning", "Please select a zone first!")
             return
             
-        threshold = self.get_changes_threshold()
-        if threshold is None and self.changes_entry.get().strip() != "-":
+        try:
+            parse_changes(self.changes_entry.get())
+        except ValueError:
             messagebox.showwarning("Warning", "Please enter a valid number or '-' to disable!")
             return
             
+        try:
+            parse_delay(self.delay_entry.get())
+        except ValueError:
+            messagebox.showwarning("Warning", "Please enter a valid delay in seconds!")
+            return
+            
         self.is_running = True
-        self.change_count = 0
-        self.last_detected_value = None
+        self.tracker.reset()
         
         self.start_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self.update_status("Monitoring started...")
         self.changes_count_label.configure(text="Changes: 0")
         
-        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        if self.settings.runtime == 'asyncio':
+            self.get_async_runtime().start_engine('main', self.selected_zone)
+        else:
+            self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
+            self.monitor_thread.start()
+        
+    def toggle_monitoring(self):
+        if self.is_running:
+            self.stop_monitoring()
+        else:
+            self.start_monitoring()
+        
+    def get_async_runtime(self):
+        """Create the asyncio runtime on first use and route deliveries through it"""
+        if self.async_runtime is None:
+            self.async_runtime = AsyncMonitorRuntime(self)
+            self.outbox.send = self.async_runtime.sender
+        return self.async_runtime
         
     def stop_monitoring(self):
         if not self.is_running:
             return
             
         self.is_running = False
+        if self.async_runtime is not None:
+            self.async_runtime.stop_engine('main')
         self.start_btn.configure(state="normal")
         self.stop_btn.configure(state="disabled")
         self.update_status("Monitoring stopped.")
@@ -849,9 +1043,17 @@ class ScreenMonitorApp(ctk.CTk):
         self.status_text.configure(text=text)
         
     def on_closing(self):
+        self.commands.stop()
         self.save_config()
+        self.settings_store.close()
         self.is_running = False
         keyboard.unhook_all()
+        if self.archive is not None:
+            self.archive.close()  # Flushes pending writes into the outbox
+        self.outbox.close()
+        self.webhook_sender.close()
+        if self.async_runtime is not None:
+            self.async_runtime.close()
         self.destroy()
 
 
@@ -0,0 +1,311 @@
+# settings.py - Typed settings with atomic, debounced saving and hot reload
+import os
+import sys
+import json
+import threading
+import tempfile
+from dataclasses import dataclass, replace, fields
+from typing import Optional, Tuple, Union
+from color_classifier import DEFAULT_TARGET_COLORS, DEFAULT_TOLERANCE, DEFAULT_METRIC, DEFAULT_BITS, normalize_params
+from archive import DEFAULT_MAX_BYTES, DEFAULT_MAX_AGE_DAYS
+
+RUNTIMES = ('thread', 'asyncio')
+MEMORY_MODES = ('normal', 'bounded')
+COMMANDS = ('start', 'stop', 'toggle', 'select_zone', 'retry_failed')
+DEFAULT_HOTKEYS = (('F1', 'start'), ('F3', 'stop'))
+SAVE_DELAY = 0.5  # Seconds to wait for more changes before writing
+WATCH_INTERVAL = 1.0  # Seconds between checks for external edits
+
+
+# Config file path
+def get_config_path():
+    if getattr(sys, 'frozen', False):
+        # Running as exe
+        return os.path.join(os.path.dirname(sys.executable), 'config.json')
+    else:
+        # Running as script
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+
+
+def get_cache_dir():
+    """Directory for generated data such as color lookup tables"""
+    return os.path.join(os.path.dirname(get_config_path()), 'cache')
+
+
+def parse_changes(value):
+    """Parse the changes field: '-' disables screenshots (None), otherwise a positive int"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value == '-':
+        return None
+    number = int(value)
+    if number < 1:
+        raise ValueError("Changes must be at least 1")
+    return number
+
+
+def parse_delay(value):
+    """Parse the delay field in seconds"""
+    delay = float(str(value).strip())
+    if not 0 <= delay <= 3600:
+        raise ValueError("Delay must be between 0 and 3600 seconds")
+    return delay
+
+
+def parse_zone(value):
+    """Parse a zone as an (x1, y1, x2, y2) tuple or None"""
+    if not value:
+        return None
+    zone = tuple(int(v) for v in value)
+    if len(zone) != 4 or zone[2] <= zone[0] or zone[3] <= zone[1]:
+        raise ValueError(f"Invalid zone: {value}")
+    return zone
+
+
+def parse_command(value):
+    """Split a hotkey command like 'start' or 'toggle boss' into (command, zone name or None)"""
+    parts = str(value).split()
+    if not 1 <= len(parts) <= 2 or parts[0] not in COMMANDS:
+        raise ValueError(f"Unknown command: {value!r} (use one of {', '.join(COMMANDS)}, optionally with a zone name)")
+    return parts[0], parts[1] if len(parts) == 2 else None
+
+
+def parse_hotkeys(value):
+    """Parse {"F1": "start", "ctrl+2": "toggle boss"} into ((key, command), ...)"""
+    if not isinstance(value, dict):
+        raise ValueError("Hotkeys must map keys to commands")
+    hotkeys = []
+    for key, command in value.items():
+        parse_command(command)
+        hotkeys.append((str(key).strip(), ' '.join(str(command).split())))
+    return tuple(hotkeys)
+
+
+def parse_zones(value):
+    """Parse extra named zones {"boss": [x1, y1, x2, y2]} into ((name, zone), ...)"""
+    if not isinstance(value, dict):
+        raise ValueError("Zones must map names to [x1, y1, x2, y2]")
+    zones = []
+    for name, zone in value.items():
+        name = str(name).strip()
+        if not name or len(name.split()) != 1 or name == 'main':
+            raise ValueError(f"Invalid zone name: {name!r}")
+        zone = parse_zone(zone)
+        if zone is None:
+            raise ValueError(f"Zone '{name}' is empty")
+        zones.append((name, zone))
+    return tuple(zones)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Validated application settings; replaced as a whole on every change"""
+
+    webhook: str = ''
+    changes_threshold: Optional[int] = 5
+    delay: float = 3.0
+    zone: Optional[Tuple[int, int, int, int]] = None
+    target_colors: Tuple[Tuple[int, int, int], ...] = tuple(tuple(c) for c in DEFAULT_TARGET_COLORS)
+    color_tolerance: Union[float, Tuple[float, float, float]] = DEFAULT_TOLERANCE
+    color_metric: str = DEFAULT_METRIC
+    lut_bits: int = DEFAULT_BITS
+    runtime: str = 'thread'
+    memory_mode: str = 'normal'
+    archive_max_mb: int = DEFAULT_MAX_BYTES // (1024 * 1024)
+    archive_max_days: float = DEFAULT_MAX_AGE_DAYS
+    hotkeys: Tuple[Tuple[str, str], ...] = DEFAULT_HOTKEYS
+    zones: Tuple[Tuple[str, Tuple[int, int, int, int]], ...] = ()
+
+    @classmethod
+    def from_dict(cls, data, fallback=None):
+        """Build settings from config.json contents.
+
+        Missing or invalid values are taken from `fallback` (the current
+        settings when a file is reloaded), or the defaults.
+        """
+        defaults = fallback if fallback is not None else cls()
+        values = {}
+        parsers = {
+            'webhook': ('webhook', lambda v: str(v).strip()),
+            'changes_threshold': ('changes', parse_changes),
+            'delay': ('delay', parse_delay),
+            'zone': ('zone', parse_zone),
+            'runtime': ('runtime', lambda v: v if v in RUNTIMES else defaults.runtime),
+            'memory_mode': ('memory_mode', lambda v: v if v in MEMORY_MODES else defaults.memory_mode),
+            'archive_max_mb': ('archive_max_mb', lambda v: max(int(v), 1)),
+            'archive_max_days': ('archive_max_days', lambda v: max(float(v), 0)),
+            'hotkeys': ('hotkeys', parse_hotkeys),
+            'zones': ('zones', parse_zones),
+        }
+        for name, (key, parse) in parsers.items():
+            if key in data:
+                try:
+                    values[name] = parse(data[key])
+                except (TypeError, ValueError) as e:
+                    print(f"Invalid setting '{key}': {e}")
+
+        # Color settings are validated together
+        try:
+            params = normalize_params(
+                data.get('target_colors', defaults.target_colors),
+                data.get('color_tolerance', defaults.color_tolerance),
+                data.get('color_metric', defaults.color_metric),
+                data.get('lut_bits', defaults.lut_bits)
+            )
+            values['target_colors'] = tuple(tuple(c) for c in params['targets'])
+            tolerance = params['tolerance']
+            values['color_tolerance'] = tuple(tolerance) if isinstance(tolerance, list) else tolerance
+            values['color_metric'] = params['metric']
+            values['lut_bits'] = params['bits']
+        except (TypeError, ValueError) as e:
+            print(f"Invalid color settings: {e}")
+
+        return replace(defaults, **values)
+
+    def to_dict(self):
+        """config.json representation (keeps the original key names)"""
+        tolerance = self.color_tolerance
+        return {
+            'webhook': self.webhook,
+            'changes': '-' if self.changes_threshold is None else str(self.changes_threshold),
+            'delay': f"{self.delay:g}",
+            'zone': list(self.zone) if self.zone else None,
+            'target_colors': [list(c) for c in self.target_colors],
+            'color_tolerance': list(tolerance) if isinstance(tolerance, tuple) else tolerance,
+            'color_metric': self.color_metric,
+            'lut_bits': self.lut_bits,
+            'runtime': self.runtime,
+            'memory_mode': self.memory_mode,
+            'archive_max_mb': self.archive_max_mb,
+            'archive_max_days': self.archive_max_days,
+            'hotkeys': dict(self.hotkeys),
+            'zones': {name: list(zone) for name, zone in self.zones},
+        }
+
+    def get_zone(self, name):
+        """Zone monitored by the engine with this name ('main' is the selected zone)"""
+        if name == 'main':
+            return self.zone
+        return dict(self.zones).get(name)
+
+    def changed_fields(self, other):
+        return [f.name for f in fields(self) if getattr(self, f.name) != getattr(other, f.name)]
+
+
+class SettingsStore:
+    """Holds the current Settings and keeps config.json in sync with it.
+
+    Readers just take `store.settings` - the object is immutable and swapped
+    in one assignment, so other threads never see a half-applied update.
+    Changes are written after SAVE_DELAY seconds of quiet through a temp
+    file and os.replace, so the file is never left half-written. A watcher
+    thread picks up external edits and notifies listeners with
+    (old, new, source) where source is 'app' or 'file'.
+    """
+
+    def __init__(self, path, save_delay=SAVE_DELAY, watch_interval=WATCH_INTERVAL):
+        self.path = path
+        self.save_delay = save_delay
+        self.watch_interval = watch_interval
+        self.listeners = []
+        self._lock = threading.RLock()
+        self._timer = None
+        self._file_state = None
+        self._stopped = threading.Event()
+        self._watcher = None
+        self.settings = self._read() or Settings()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _read(self, fallback=None):
+        """Load settings from disk, or None if the file is missing or unreadable"""
+        state = self._stat()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self._file_state = None
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error loading config: {e}")
+            return None
+        self._file_state = state
+        return Settings.from_dict(data if isinstance(data, dict) else {}, fallback)
+
+    def update(self, **changes):
+        """Apply changes (already parsed values), notify listeners and schedule a save"""
+        with self._lock:
+            old = self.settings
+            new = replace(old, **changes)
+            if new == old:
+                return new
+            self.settings = new
+            self._schedule_save()
+        self._notify(old, new, 'app')
+        return new
+
+    def _notify(self, old, new, source):
+        for listener in list(self.listeners):
+            try:
+                listener(old, new, source)
+            except Exception as e:
+                print(f"Settings listener error: {e}")
+
+    def _schedule_save(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.save_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Write the current settings now (atomic temp-file swap)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.settings.to_dict(), f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._file_state = self._stat()
+            except OSError as e:
+                print(f"Error saving config: {e}")
+                try:
+                    os.remove(tmp_path)
+                except (OSError, UnboundLocalError):
+                    pass
+
+    def start_watching(self):
+        """Start polling config.json for external edits"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch_loop, name='settings-watcher', daemon=True)
+            self._watcher.start()
+
+    def _watch_loop(self):
+        while not self._stopped.wait(self.watch_interval):
+            with self._lock:
+                if self._timer is not None or self._stat() == self._file_state:
+                    continue  # Own save pending or file unchanged
+                old = self.settings
+                new = self._read(old)  # An invalid value in the edit keeps the current one
+                if new is None or new == old:
+                    continue
+                self.settings = new
+            self._notify(old, new, 'file')
+
+    def close(self):
+        """Stop watching and write any pending changes"""
+        self._stopped.set()
+        if self._timer is not None:
+            self.flush()
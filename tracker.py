@@ -0,0 +1,53 @@
+# tracker.py - Streak value stability and change counting
+STABILITY_THRESHOLD = 2  # Value must be the same 2 times to be considered stable
+POLL_INTERVAL = 0.3  # Seconds between zone captures
+
+
+class StreakTracker:
+    """Turns raw OCR readings into confirmed value changes.
+
+    A reading only counts once it has been seen STABILITY_THRESHOLD times in
+    a row, which filters out single-frame OCR mistakes.
+    """
+
+    __slots__ = ('stability', 'last_value', 'stable_value', 'stable_count', 'change_count')
+
+    def __init__(self, stability=STABILITY_THRESHOLD):
+        self.stability = stability
+        self.reset()
+
+    def reset(self):
+        self.last_value = None
+        self.stable_value = None
+        self.stable_count = 0
+        self.change_count = 0
+
+    def update(self, detected):
+        """Feed one reading, returns ('initial', value), ('change', old, new) or None"""
+        if detected == self.stable_value:
+            self.stable_count += 1
+        else:
+            self.stable_value = detected
+            self.stable_count = 1
+
+        # Only process if value is stable (detected multiple times in a row)
+        if self.stable_count < self.stability:
+            return None
+        # If this is the first stable value, just record it
+        if self.last_value is None:
+            self.last_value = self.stable_value
+            return ('initial', self.stable_value)
+        # Check for actual change from last confirmed value
+        if self.stable_value != self.last_value:
+            old = self.last_value
+            self.change_count += 1
+            self.last_value = self.stable_value
+            return ('change', old, self.stable_value)
+        return None
+
+    def take_trigger(self, threshold):
+        """True (and resets the count) once changes reach the threshold"""
+        if threshold is not None and self.change_count >= threshold:
+            self.change_count = 0
+            return True
+        return False
@@ -0,0 +1,174 @@
+# zone_tracker.py - Re-anchors the monitored zone when the streak label moves
+import numpy as np
+
+MISS_LIMIT = 2  # Empty reads in a row before searching
+WINDOW_SCALE = 3  # Search window size in multiples of the zone size
+FRAME_STEP = 4  # Pixel stride for the reduced-resolution full-frame search
+MIN_FILL = 0.02  # Share of the zone that must be text colored to accept a match
+MAX_BACKOFF = 16  # Max frames to skip between unsuccessful searches
+MAX_CANDIDATES = 4  # Matches per search that are checked with OCR
+
+
+def box_sums(mask, box_h, box_w):
+    """Count of set pixels in every box_h x box_w window, via an integral image"""
+    ii = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(mask, axis=0, dtype=np.int32), axis=1, out=ii[1:, 1:])
+    return ii[box_h:, box_w:] - ii[:-box_h, box_w:] - ii[box_h:, :-box_w] + ii[:-box_h, :-box_w]
+
+
+def find_blobs(mask, box_h, box_w, min_count, limit=MAX_CANDIDATES):
+    """Top-left (y, x) of up to `limit` separate windows with the most text pixels.
+
+    Windows within a box of a previous hit are skipped, so a text colored
+    element larger than the box yields one hit rather than all of them.
+    """
+    box_h = max(1, min(box_h, mask.shape[0]))
+    box_w = max(1, min(box_w, mask.shape[1]))
+    sums = box_sums(mask, box_h, box_w)
+    hits = []
+    while len(hits) < limit:
+        y, x = np.unravel_index(np.argmax(sums), sums.shape)
+        if sums[y, x] < min_count:
+            break
+        hits.append((int(y), int(x)))
+        sums[max(0, y - 2 * box_h + 1):y + 2 * box_h, max(0, x - 2 * box_w + 1):x + 2 * box_w] = -1
+    return hits
+
+
+class ZoneAnchor:
+    """Keeps the effective capture zone on the streak label as it moves.
+
+    After MISS_LIMIT empty reads the selected zone (`base`) is checked
+    first, then the label is searched in a window around the current zone
+    and then in the whole screen at reduced resolution, by box-summing the
+    color mask. Matches are tried closest to the selected zone first, and
+    the zone only moves to one that `read` gets digits from, so other
+    elements in the text color do not capture it. The zone keeps its size
+    and is centred on the text of the match. Unsuccessful searches back
+    off so an absent label does not cost a full-screen grab every frame.
+    """
+
+    __slots__ = ('base', 'zone', 'grab', 'read', 'misses', 'skip', 'backoff', 'window_scale', 'frame_step')
+
+    def __init__(self, zone, grab, read, window_scale=WINDOW_SCALE, frame_step=FRAME_STEP):
+        self.grab = grab
+        self.read = read
+        self.window_scale = window_scale
+        self.frame_step = frame_step
+        self.reset(zone)
+
+    def reset(self, zone):
+        """Anchor to a newly selected zone"""
+        self.base = zone
+        self.zone = zone
+        self.misses = 0
+        self.skip = 0
+        self.backoff = 1
+
+    def found(self):
+        self.misses = 0
+        self.backoff = 1
+
+    def missed(self, classifier):
+        """Record an empty read; returns True if the zone was moved"""
+        self.misses += 1
+        if self.zone is None or self.misses < MISS_LIMIT:
+            return False
+        if self.skip > 0:
+            self.skip -= 1
+            return False
+
+        new_zone = self._search(classifier)
+        if new_zone is None:
+            self.skip = self.backoff
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+            return False
+        self.zone = new_zone
+        self.misses = 0
+        self.backoff = 1
+        return True
+
+    def _search(self, classifier):
+        """Selected zone if the label is back there, else the closest match that reads as digits"""
+        if self.zone != self.base and self._reads(self.base):
+            return self.base
+        for search in (self._search_window, self._search_frame):
+            for zone in sorted(search(classifier), key=self._distance):
+                if zone != self.zone and self._reads(zone):
+                    return zone
+        return None
+
+    def _distance(self, zone):
+        return (zone[0] - self.base[0]) ** 2 + (zone[1] - self.base[1]) ** 2
+
+    def _reads(self, zone):
+        image = self.grab(zone)
+        try:
+            return bool(self.read(image))
+        finally:
+            image.close()
+
+    def _size(self):
+        x1, y1, x2, y2 = self.zone
+        return x2 - x1, y2 - y1
+
+    def _locate(self, classifier, image, origin_x, origin_y, step):
+        """Zone-sized matches in an image whose top-left is at origin"""
+        width, height = self._size()
+        array = np.asarray(image)
+        coarse = array[::step, ::step] if step > 1 else array
+        mask = classifier.mask(coarse)
+        box_w = max(1, width // step)
+        box_h = max(1, height // step)
+        zones = []
+        for hit_y, hit_x in find_blobs(mask, box_h, box_w, max(3, int(box_w * box_h * MIN_FILL))):
+            x, y = self._center(classifier, array, hit_x * step, hit_y * step)
+            zone = (origin_x + x, origin_y + y, origin_x + x + width, origin_y + y + height)
+            if zone not in zones:
+                zones.append(zone)
+        return zones
+
+    def _center(self, classifier, array, x, y):
+        """Top-left of the zone centred on the text pixels around a match at (x, y).
+
+        The box sum only says which zone-sized window holds the most text,
+        which puts the label against its right or bottom edge (or clips it)
+        and is off by up to the search stride. The text pixels in a margin
+        of half a zone around the match are measured at full resolution
+        instead: the zone is centred on their bounding box, or on their
+        centroid if other text in the margin makes the box larger than the
+        zone.
+        """
+        width, height = self._size()
+        img_h, img_w = array.shape[:2]
+        left, top = max(0, x - width // 2), max(0, y - height // 2)
+        right, bottom = min(img_w, x + width + width // 2), min(img_h, y + height + height // 2)
+        ys, xs = np.nonzero(classifier.mask(array[top:bottom, left:right]))
+        if len(xs):
+            if xs.max() - xs.min() < width and ys.max() - ys.min() < height:
+                cx, cy = (xs.min() + xs.max()) / 2, (ys.min() + ys.max()) / 2
+            else:
+                cx, cy = xs.mean(), ys.mean()
+            x = int(round(left + cx - (width - 1) / 2))
+            y = int(round(top + cy - (height - 1) / 2))
+        return max(0, min(x, img_w - width)), max(0, min(y, img_h - height))
+
+    def _search_window(self, classifier):
+        width, height = self._size()
+        x1, y1, _, _ = self.zone
+        pad_x = width * (self.window_scale - 1) // 2
+        pad_y = height * (self.window_scale - 1) // 2
+        left, top = max(0, x1 - pad_x), max(0, y1 - pad_y)
+        bbox = (left, top, x1 + width + pad_x, y1 + height + pad_y)
+        image = self.grab(bbox)
+        try:
+            return self._locate(classifier, image, left, top, 1)
+        finally:
+            image.close()
+
+    def _search_frame(self, classifier):
+        image = self.grab(None)
+        try:
+            return self._locate(classifier, image, 0, 0, self.frame_step)
+        finally:
+            image.close()